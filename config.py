@@ -1,19 +1,40 @@
 import os
 
 # Database Configuration
+# 'mysql': MySQL server below, 'sqlite': single-file database at SQLITE_PATH (no server needed)
+DB_BACKEND = 'mysql'
+SQLITE_PATH = os.path.join("data", "posture_health.db")
 DB_HOST = 'localhost'
 DB_USER = 'root'
 DB_PASSWORD = '030608' # Change this to your MySQL password
 DB_NAME = 'posture_health'
+DB_POOL_SIZE = 4 # pooled connections shared by the GUI and background threads
 
 # Camera Configuration
 CAMERA_ID = 0
 FRAME_WIDTH = 1280
 FRAME_HEIGHT = 720
+# Run capture / inference / render as separate threads (drops stale frames)
+VIDEO_PIPELINED = True
 
 # Algorithm Configuration
 ALERT_THRESHOLD_SECONDS = 30
+# Posture timeline: a label change must last this long to start a new logged segment
+TIMELINE_MIN_SEGMENT_SECONDS = 2.0
 MODEL_PATH = os.path.join("data", "posture_model.pkl")
+# Skip pose inference while the picture is static (mean gray-level change below threshold),
+# but run it at least every MOTION_GATE_MAX_STALE_SECONDS
+MOTION_GATE_ENABLED = True
+MOTION_GATE_THRESHOLD = 2.0
+MOTION_GATE_MAX_STALE_SECONDS = 1.0
+# Run pose detection on a padded, downscaled crop around the person from the previous
+# frame instead of the full frame (falls back to the full frame when tracking is lost)
+POSE_ROI_TRACKING = True
+# Switch MediaPipe model_complexity (0/1/2) at runtime so pose inference stays within
+# INFERENCE_CPU_BUDGET (fraction of the frame interval) at TARGET_FPS
+ADAPTIVE_COMPLEXITY = True
+TARGET_FPS = 15
+INFERENCE_CPU_BUDGET = 0.8
 
 # Paths
 DATA_RAW = os.path.join("data", "raw")
@@ -0,0 +1,101 @@
+import os
+import numpy as np
+from .geometry import ANGLE_FEATURES, batch_features
+from .linear_model import LinearPostureModel
+import config
+
+def weights_path(model_path):
+    # data/posture_model.pkl -> data/posture_model.npz (written by ModelTrainer / export_model.py)
+    return os.path.splitext(model_path)[0] + ".npz"
+
+class PostureClassifier:
+    # Trained posture model + expert rules. Holds no per-stream state, so one instance
+    # can serve every stream and thread (see engine.InferenceBackend).
+    def __init__(self, model_path=config.MODEL_PATH):
+        # Load Model: the exported .npz weights when they are at least as new as the pickle
+        # (NumPy only), otherwise the pickled sklearn model
+        self.model = None
+        self.model_loaded = False
+        npz_path = weights_path(model_path)
+        if os.path.exists(npz_path) and (not os.path.exists(model_path)
+                                         or os.path.getmtime(npz_path) >= os.path.getmtime(model_path)):
+            self.model = LinearPostureModel.load(npz_path)
+        elif os.path.exists(model_path):
+            import pickle # unpickling imports sklearn
+            with open(model_path, 'rb') as f:
+                self.model = pickle.load(f)
+            try:
+                # Linear models still get the fast scorer; export_model.py skips sklearn next time
+                self.model = LinearPostureModel.from_sklearn(
+                    self.model, getattr(self.model, 'feature_names_in_', ANGLE_FEATURES))
+            except ValueError:
+                pass
+        else:
+            print(f"Model not found at {model_path}. Using fallback logic.")
+        self.model_loaded = self.model is not None
+
+        # Feature order the model was trained with
+        self.feature_names = getattr(self.model, 'feature_names', ANGLE_FEATURES)
+
+    def classify(self, lm_list):
+        # Returns (instant_label, model confidence, features) for one pose
+        confidence = 0.0
+
+        # 2. Base Features & Expert Metrics (one vectorized pass)
+        metrics = batch_features(lm_list)
+        features = {k: v[0] for k, v in metrics.items()}
+
+        # --- Expert System Metrics ---
+        slope = features['shoulder_slope']
+        deviation = features['head_deviation']
+
+        # 3D Depth (Forward Head)
+        z_diff = features['z_diff']
+
+        # Rotation
+        body_rotation = features['body_rotation']
+        is_frontal = body_rotation < 0.20
+
+        # --- HYBRID LOGIC: Model First, Expert Second ---
+        model_prediction = 1 # Default to Good
+
+        if self.model_loaded:
+            # 1. Verify with Trained Model (The Authority)
+            feat_vector = np.array([[features[name] for name in self.feature_names]])
+            if isinstance(self.model, LinearPostureModel):
+                # Label and confidence from a single dot product
+                model_prediction, confidence = self.model.predict_with_confidence(feat_vector)
+            else:
+                model_prediction = self.model.predict(feat_vector)[0]
+
+                # Calculate Confidence
+                if hasattr(self.model, "predict_proba"):
+                    confidence = max(self.model.predict_proba(feat_vector)[0])
+                elif hasattr(self.model, "decision_function"):
+                    dist = abs(self.model.decision_function(feat_vector)[0])
+                    confidence = 1 / (1 + np.exp(-dist))
+
+        # --- Final Decision & Labeling ---
+
+        if model_prediction == 0: # Model says BAD
+            # Use Geometry to diagnose WHY it is bad
+            if is_frontal and abs(slope) > 30:
+                instant_label = "Leaning Right" if slope > 0 else "Leaning Left"
+            elif is_frontal and abs(deviation) > 0.20:
+                instant_label = "Head Not Centered"
+            elif is_frontal and z_diff < -0.15:
+                instant_label = "Forward Head"
+            else:
+                instant_label = "Slouching" # Generic Bad from Model
+
+        else: # Model says GOOD
+            # SAFETY NET: Did the Model miss a 3D Forward Head issue?
+            # (SVM only sees 2D angles, so it often misses pure Z-axis movement)
+            if is_frontal and z_diff < -0.20: # Use safe hard threshold for "Extreme" forward head
+                instant_label = "Forward Head (3D)"
+                model_prediction = 0 # Force Bad
+            else:
+                instant_label = "Good"
+                if not is_frontal: instant_label = "Good (Side)"
+
+        return instant_label, confidence, features
@@ -0,0 +1,84 @@
+import time
+
+class ComplexityController:
+    # Adapts PoseDetector's model_complexity (0 = lite, 1 = full, 2 = heavy) to hold
+    # an inference latency budget of cpu_budget / target_fps seconds per frame.
+    # Hysteresis: a switch needs a full window of measurements over / well under budget,
+    # is followed by a cooldown, and a tier already measured as too slow is not retried.
+    # Tiers whose graph can't be built (see check_tiers) are skipped.
+    def __init__(self, detector, target_fps=15, cpu_budget=1.0, tiers=(0, 1, 2),
+                 window=30, upgrade_margin=0.5, cooldown=90):
+        self.detector = detector
+        self.budget = cpu_budget / target_fps
+        self.tiers = tiers
+        self.window = window
+        self.upgrade_margin = upgrade_margin
+        self.cooldown = cooldown
+
+        self.tier = detector.model_complexity
+        self.latency = None # EMA of inference latency (seconds) on the current tier
+        self.tier_latency = {} # last known EMA per tier
+        self.unavailable = set()
+        self.over = 0
+        self.under = 0
+        self.frames_since_switch = 0
+
+    def record(self, latency):
+        alpha = 2.0 / (self.window + 1)
+        self.latency = latency if self.latency is None else (1 - alpha) * self.latency + alpha * latency
+        self.frames_since_switch += 1
+        if self.frames_since_switch < self.cooldown:
+            return
+
+        self.tier_latency[self.tier] = self.latency
+        tiers = [t for t in self.tiers if t not in self.unavailable or t == self.tier]
+        idx = tiers.index(self.tier)
+
+        # Count consecutive frames over budget / comfortably under it
+        self.over = self.over + 1 if self.latency > self.budget else 0
+        self.under = self.under + 1 if self.latency < self.budget * self.upgrade_margin else 0
+
+        if self.over >= self.window and idx > 0:
+            self.switch(tiers[idx - 1])
+        elif self.under >= self.window and idx < len(tiers) - 1:
+            heavier = tiers[idx + 1]
+            # Don't flap back into a tier we already know can't hold the budget
+            if self.tier_latency.get(heavier, 0) <= self.budget:
+                self.switch(heavier)
+
+    def check_tiers(self):
+        # Loads every other tier's graph once, up front (off the inference thread), so a
+        # later switch neither downloads a model mid-session nor fails on it
+        for tier in self.tiers:
+            try:
+                self.detector.check_model_complexity(tier)
+            except Exception as e:
+                print(f"Model complexity {tier} unavailable: {e}")
+                self.unavailable.add(tier)
+
+    def switch(self, tier):
+        print(f"Model complexity {self.tier} -> {tier} (latency {self.latency * 1000:.1f}ms, "
+              f"budget {self.budget * 1000:.1f}ms)")
+        try:
+            self.detector.set_model_complexity(tier)
+        except Exception as e:
+            # The detector keeps the current graph; start a fresh window on it
+            print(f"Model complexity {tier} unavailable: {e}")
+            self.unavailable.add(tier)
+            tier = self.tier
+        self.tier = tier
+        self.latency = None
+        self.over = 0
+        self.under = 0
+        self.frames_since_switch = 0
+
+    def timed(self, func, *args, **kwargs):
+        # Runs func and records its wall time as one inference measurement
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.record(time.perf_counter() - start)
+        return result
+
+    def report(self):
+        latency = f"{self.latency * 1000:.1f}ms" if self.latency is not None else "--"
+        return f"Model: {self.tier} ({latency})"
@@ -1,39 +1,142 @@
 import mediapipe as mp
 import cv2
 import numpy as np
+from .geometry import batch_features, NUM_LANDMARKS
 
 class PoseDetector:
-    def __init__(self, static_image_mode=False, model_complexity=1, smooth_landmarks=True):
+    def __init__(self, static_image_mode=False, model_complexity=1, smooth_landmarks=True,
+                 roi_tracking=False, roi_padding=0.25, roi_max_side=480):
         self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(
-            static_image_mode=static_image_mode,
-            model_complexity=model_complexity,
-            smooth_landmarks=smooth_landmarks,
+        self.static_image_mode = static_image_mode
+        self.model_complexity = model_complexity
+        self.smooth_landmarks = smooth_landmarks
+        self.pose = self.create_pose()
+        self.mp_drawing = mp.solutions.drawing_utils
+
+        # Reusable landmark buffers (see find_position)
+        self.landmarks = np.zeros((NUM_LANDMARKS, 5), dtype=np.float32)
+        self.landmarks[:, 0] = np.arange(NUM_LANDMARKS)
+        self.no_landmarks = np.zeros((0, 5), dtype=np.float32)
+
+        # ROI tracking: crop (and downscale) around the person found in the previous frame.
+        # roi_padding: margin around the landmark box, as a fraction of its larger side.
+        # roi_max_side: the crop is downscaled so its larger side is at most this many pixels.
+        self.roi_tracking = roi_tracking
+        self.roi_padding = roi_padding
+        self.roi_max_side = roi_max_side
+        self.roi = None         # (x0, y0, x1, y1) to use for the next frame, None = full frame
+        self.result_roi = None  # region the current self.results are relative to
+
+    def create_pose(self, model_complexity=None):
+        # MediaPipe downloads the lite / heavy model the first time a graph needs it
+        return self.mp_pose.Pose(
+            static_image_mode=self.static_image_mode,
+            model_complexity=self.model_complexity if model_complexity is None else model_complexity,
+            smooth_landmarks=self.smooth_landmarks,
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5
         )
-        self.mp_drawing = mp.solutions.drawing_utils
+
+    def set_model_complexity(self, model_complexity):
+        # Rebuilds the MediaPipe graph (0 = lite, 1 = full, 2 = heavy). The new graph is
+        # built first: if that raises, the current one keeps running unchanged.
+        if model_complexity == self.model_complexity:
+            return
+        pose = self.create_pose(model_complexity)
+        self.pose.close()
+        self.pose = pose
+        self.model_complexity = model_complexity
+        # The new graph has no tracking state; start again from the full frame
+        self.roi = None
+
+    def check_model_complexity(self, model_complexity):
+        # Builds (and closes) a graph for that tier so its model is on disk before a switch
+        # needs it; raises if it can't be loaded (e.g. offline on first use)
+        if model_complexity != self.model_complexity:
+            self.create_pose(model_complexity).close()
 
     def find_pose(self, img, draw=True):
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        h, w = img.shape[:2]
+        x0, y0, x1, y1 = self.roi if (self.roi_tracking and self.roi) else (0, 0, w, h)
+        crop = img[y0:y1, x0:x1]
+
+        if self.roi_tracking:
+            scale = self.roi_max_side / max(x1 - x0, y1 - y0)
+            if scale < 1:
+                crop = cv2.resize(crop, (int((x1 - x0) * scale), int((y1 - y0) * scale)),
+                                  interpolation=cv2.INTER_AREA)
+
+        img_rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
         self.results = self.pose.process(img_rgb)
+        self.result_roi = (x0, y0, x1, y1)
+
+        if self.roi_tracking:
+            self.update_roi(img)
         
-        if self.results.pose_landmarks and draw:
+        if draw:
+            self.draw_pose(img)
+        return img
+
+    def update_roi(self, img):
+        # Derives the ROI for the next frame from the landmarks just found.
+        # Falls back to the full frame when tracking is lost.
+        lm_array = self.find_position(img)
+        visible = lm_array[lm_array[:, 4] > 0.5] if len(lm_array) else lm_array
+        if len(visible) < 5:
+            self.roi = None
+            return
+
+        h, w = img.shape[:2]
+        bx0, by0 = visible[:, 1].min(), visible[:, 2].min()
+        bx1, by1 = visible[:, 1].max(), visible[:, 2].max()
+
+        # Keep the current ROI while the person stays well inside it (stable crops keep
+        # MediaPipe's own tracking and smoothing consistent between frames)
+        if self.roi:
+            rx0, ry0, rx1, ry1 = self.roi
+            margin = 0.05 * max(rx1 - rx0, ry1 - ry0)
+            if bx0 > rx0 + margin and by0 > ry0 + margin and bx1 < rx1 - margin and by1 < ry1 - margin:
+                return
+
+        pad = self.roi_padding * max(bx1 - bx0, by1 - by0, 64)
+        roi = (max(0, int(bx0 - pad)), max(0, int(by0 - pad)),
+               min(w, int(bx1 + pad) + 1), min(h, int(by1 + pad) + 1))
+        self.roi = roi if roi[2] > roi[0] and roi[3] > roi[1] else None
+
+    def draw_pose(self, img, pose_landmarks=None, roi=None, scale=1.0):
+        # Draws the skeleton from the last find_pose call, or the given pose_landmarks /
+        # roi saved from an earlier one. scale: img size relative to the processed frame
+        # (e.g. to draw on a downsized display copy).
+        if pose_landmarks is None:
+            pose_landmarks, roi = self.results.pose_landmarks, self.result_roi
+        if pose_landmarks:
+            # Results are normalized to the inference region; draw into that view of img
+            if roi:
+                x0, y0, x1, y1 = (int(round(v * scale)) for v in roi)
+            else:
+                x0, y0, x1, y1 = 0, 0, img.shape[1], img.shape[0]
             self.mp_drawing.draw_landmarks(
-                img, self.results.pose_landmarks, self.mp_pose.POSE_CONNECTIONS
+                img[y0:y1, x0:x1], pose_landmarks, self.mp_pose.POSE_CONNECTIONS
             )
         return img
 
     def find_position(self, img):
-        lm_list = []
-        if self.results.pose_landmarks:
-            for id, lm in enumerate(self.results.pose_landmarks.landmark):
-                h, w, c = img.shape
-                # cx, cy are pixel coordinates
-                cx, cy = int(lm.x * w), int(lm.y * h)
-                # visibility is also useful
-                lm_list.append([id, cx, cy, lm.z, lm.visibility])
-        return lm_list
+        # Returns a float32 (33, 5) array, rows = [id, x, y, z, visibility],
+        # or an empty (0, 5) array when no pose was found.
+        # NOTE: the same buffer is refilled on every call; copy() it to keep a frame.
+        if not self.results.pose_landmarks:
+            return self.no_landmarks
+
+        h, w = img.shape[:2]
+        x0, y0, x1, y1 = self.result_roi or (0, 0, w, h)
+        lm_array = self.landmarks
+        lm_array[:, 1:] = [(lm.x, lm.y, lm.z, lm.visibility) for lm in self.results.pose_landmarks.landmark]
+        # x, y are full-frame pixel coordinates (kept as float, no int truncation)
+        lm_array[:, 1] = lm_array[:, 1] * (x1 - x0) + x0
+        lm_array[:, 2] = lm_array[:, 2] * (y1 - y0) + y0
+        # z is in units of the inference image width; rescale to the full frame width
+        lm_array[:, 3] *= (x1 - x0) / w
+        return lm_array
 
     def calculate_angle(self, p1, p2, p3):
         # p1, p2, p3 are [x, y] coordinates
@@ -92,3 +195,7 @@ class PoseDetector:
         # Positive Z: Further from camera
         return lm_list[id][3]
 
+    def calculate_features_batch(self, landmarks):
+        # landmarks: (N, 33, 5) array of stacked find_position results (or a single (33, 5) pose).
+        # Computes every angle, slope, deviation and z metric for all N poses at once.
+        return batch_features(landmarks)
@@ -0,0 +1,161 @@
+import os
+import queue
+import threading
+import time
+import cv2
+from .detector import PoseDetector
+from .classifier import PostureClassifier
+from .processor import HealthProcessor, detect_posture
+from .pipeline import FrameGrabber
+import config
+
+class InferenceBackend:
+    # Pose inference shared by many streams: a pool of `workers` PoseDetectors (one
+    # MediaPipe graph each) and a single PostureClassifier. A stream checks out an idle
+    # detector per frame and blocks while all are busy, so at most `workers` inferences
+    # run at once. MediaPipe and OpenCV release the GIL, which lets those inferences
+    # run on separate cores from plain threads, without copying frames between processes.
+    #
+    # Detectors run in static image mode: frames from different cameras are interleaved
+    # on the same graph, so MediaPipe's own tracking would mix streams up. Per-stream ROI
+    # tracking still works: each stream passes its ROI in and gets the next one back.
+    def __init__(self, workers=None, model_path=config.MODEL_PATH, model_complexity=1,
+                 roi_tracking=config.POSE_ROI_TRACKING):
+        self.workers = workers or os.cpu_count() or 1
+        self.classifier = PostureClassifier(model_path)
+        self.detectors = [PoseDetector(static_image_mode=True, model_complexity=model_complexity,
+                                       roi_tracking=roi_tracking)
+                          for _ in range(self.workers)]
+        self.idle = queue.Queue()
+        for detector in self.detectors:
+            self.idle.put(detector)
+
+    def detect(self, frame, roi=None):
+        # Returns (Detection, roi for the stream's next frame)
+        detector = self.idle.get()
+        try:
+            detector.roi = roi
+            detection = detect_posture(detector, self.classifier, frame)
+            return detection, detector.roi
+        finally:
+            self.idle.put(detector)
+
+    def draw_pose(self, img, pose_landmarks, roi=None, scale=1.0):
+        # Drawing with explicit landmarks only uses MediaPipe's stateless drawing utils
+        return self.detectors[0].draw_pose(img, pose_landmarks, roi, scale)
+
+    def close(self):
+        for detector in self.detectors:
+            detector.pose.close()
+
+class StreamWorker(threading.Thread):
+    # Reads one camera / video file and feeds it through its own HealthProcessor session
+    # (smoothing, alerts, timeline, user id) on top of the shared backend.
+    def __init__(self, name, source, processor, on_result=None):
+        super().__init__(name=f"stream-{name}", daemon=True)
+        self.stream_name = name
+        self.source = source
+        self.processor = processor
+        self.on_result = on_result # called with (stream name, label, confidence, latency seconds)
+        self.running = True
+        self.frames = 0
+        self.last_label = "Unknown"
+        self.error = None
+
+    def frames_from(self, cap, is_camera):
+        # Yields (frame, frame time or None for the wall clock, capture time).
+        # Cameras: always the newest frame (FrameGrabber drops stale ones).
+        # Files: every frame, timed as if the recording started when the stream did.
+        if not is_camera:
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            fps = fps if fps and 0 < fps <= 1000 else 30.0
+            start = time.time()
+            index = 0
+            while self.running:
+                ret, frame = cap.read()
+                if not ret:
+                    return
+                yield frame, start + index / fps, time.time()
+                index += 1
+            return
+
+        grabber = FrameGrabber(cap)
+        grabber.start()
+        try:
+            seq = 0
+            while self.running:
+                seq, item = grabber.slot.get(seq, timeout=0.5)
+                if item is not None:
+                    frame, captured_at = item
+                    yield frame, None, captured_at
+        finally:
+            grabber.stop()
+
+    def run(self):
+        is_camera = isinstance(self.source, int) or str(self.source).isdigit()
+        cap = cv2.VideoCapture(int(self.source) if is_camera else self.source)
+        if not cap.isOpened():
+            self.error = f"cannot open {self.source}"
+            print(f"Stream {self.stream_name}: {self.error}")
+            return
+        now = None
+        try:
+            for frame, now, captured_at in self.frames_from(cap, is_camera):
+                _, label, conf = self.processor.process_frame(frame, now)
+                self.frames += 1
+                self.last_label = label
+                if self.on_result:
+                    self.on_result(self.stream_name, label, conf, time.time() - captured_at)
+        except Exception as e:
+            self.error = str(e)
+            print(f"Stream {self.stream_name} failed: {e}")
+        finally:
+            cap.release()
+            self.processor.end_session(now) # log the open timeline segment
+
+    def stop(self):
+        self.running = False
+
+class MultiStreamEngine:
+    # Monitors many streams in one process:
+    #   engine = MultiStreamEngine(workers=4, db_manager=log_writer)
+    #   engine.add_stream("desk1", 0, user_id=1)
+    #   engine.add_stream("desk2", "rtsp://...", user_id=2)
+    #   engine.start(); ...; engine.stop()
+    # Each stream only holds a lightweight HealthProcessor session; the MediaPipe graphs
+    # and the posture model live once, in the InferenceBackend.
+    def __init__(self, workers=None, model_path=config.MODEL_PATH, db_manager=None, on_result=None):
+        self.backend = InferenceBackend(workers, model_path)
+        self.db = db_manager
+        self.on_result = on_result
+        self.streams = {}
+
+    def add_stream(self, name, source, user_id=1):
+        if name in self.streams:
+            raise ValueError(f"Stream '{name}' already exists")
+        processor = HealthProcessor(db_manager=self.db, user_id=user_id, backend=self.backend,
+                                    render='off', sound=False)
+        self.streams[name] = StreamWorker(name, source, processor, self.on_result)
+        return self.streams[name]
+
+    def start(self):
+        for stream in self.streams.values():
+            if not stream.is_alive():
+                stream.start()
+
+    def running(self):
+        return any(stream.is_alive() for stream in self.streams.values())
+
+    def status(self):
+        # {name: {user_id, frames, label, alerts, error}}
+        return {name: {'user_id': s.processor.user_id, 'frames': s.frames, 'label': s.last_label,
+                       'alerts': s.processor.alerts, 'error': s.error}
+                for name, s in self.streams.items()}
+
+    def stop(self):
+        for stream in self.streams.values():
+            stream.stop()
+        for stream in self.streams.values():
+            if stream.is_alive():
+                stream.join()
+        self.backend.close()
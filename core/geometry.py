@@ -0,0 +1,104 @@
+import numpy as np
+
+# Landmark array layout, shared with PoseDetector.find_position:
+# landmarks[..., i, :] = [id, x, y, z, visibility]
+COL_X = 1
+COL_Y = 2
+COL_Z = 3
+COL_VIS = 4
+
+NUM_LANDMARKS = 33
+
+# MediaPipe Keypoints used by the posture features
+NOSE = 0
+L_EAR, R_EAR = 7, 8
+L_SHOULDER, R_SHOULDER = 11, 12
+L_HIP, R_HIP = 23, 24
+
+# Order of the model's input vector (same as the columns of features.csv)
+ANGLE_FEATURES = [
+    'left_neck_incline', 'right_neck_incline',
+    'left_torso_incline', 'right_torso_incline'
+]
+
+
+def batch_angle(p1, p2, p3):
+    # p1, p2, p3: (..., 2) arrays of [x, y]. Angle at p2 in degrees.
+    ba = np.asarray(p1, dtype=np.float64) - p2
+    bc = np.asarray(p3, dtype=np.float64) - p2
+
+    denom = np.linalg.norm(ba, axis=-1) * np.linalg.norm(bc, axis=-1)
+    dot = np.einsum('...i,...i->...', ba, bc)
+
+    # Degenerate triples (two points on top of each other) give 0, like calculate_angle
+    safe = denom != 0
+    cosine_angle = np.divide(dot, denom, out=np.ones_like(dot), where=safe)
+    cosine_angle = np.clip(cosine_angle, -1.0, 1.0)
+    angle = np.degrees(np.arccos(cosine_angle))
+    return np.where(safe, angle, 0.0)
+
+
+def batch_features(landmarks):
+    # landmarks: (N, 33, k) with k >= 4 (see layout above), or a single (33, k) pose.
+    # Returns a dict of (N,) arrays with every angle / slope / deviation / z metric
+    # for all poses in one pass.
+    lm = np.asarray(landmarks, dtype=np.float64)
+    if lm.ndim == 2:
+        lm = lm[np.newaxis]
+
+    xy = lm[:, :, COL_X:COL_Y + 1]
+    z = lm[:, :, COL_Z]
+
+    l_shoulder, r_shoulder = xy[:, L_SHOULDER], xy[:, R_SHOULDER]
+    l_ear, r_ear = xy[:, L_EAR], xy[:, R_EAR]
+    l_hip, r_hip = xy[:, L_HIP], xy[:, R_HIP]
+
+    # Vertical reference point above each hip: (hip.x, hip.y - 100)
+    up = np.array([0.0, -100.0])
+
+    left_neck = batch_angle(l_ear, l_shoulder, l_hip)
+    right_neck = batch_angle(r_ear, r_shoulder, r_hip)
+    left_torso = batch_angle(l_shoulder, l_hip, l_hip + up)
+    right_torso = batch_angle(r_shoulder, r_hip, r_hip + up)
+
+    # Shoulder slope: positive = right shoulder lower (Leaning Right)
+    shoulder_slope = lm[:, R_SHOULDER, COL_Y] - lm[:, L_SHOULDER, COL_Y]
+
+    # Head deviation: nose x offset from shoulder center, in shoulder widths
+    x11, x12 = lm[:, L_SHOULDER, COL_X], lm[:, R_SHOULDER, COL_X]
+    shoulder_width = np.abs(x11 - x12)
+    offset = lm[:, NOSE, COL_X] - (x11 + x12) / 2
+    head_deviation = np.divide(offset, shoulder_width, out=np.zeros_like(offset),
+                               where=shoulder_width != 0)
+
+    # 3D depth (Forward Head): ears vs shoulders. Negative = head in front
+    ear_z = (z[:, L_EAR] + z[:, R_EAR]) / 2
+    shoulder_z = (z[:, L_SHOULDER] + z[:, R_SHOULDER]) / 2
+
+    return {
+        'left_neck_incline': left_neck,
+        'right_neck_incline': right_neck,
+        'left_torso_incline': left_torso,
+        'right_torso_incline': right_torso,
+        'shoulder_slope': shoulder_slope,
+        'head_deviation': head_deviation,
+        'z_diff': ear_z - shoulder_z,
+        'body_rotation': np.abs(z[:, L_SHOULDER] - z[:, R_SHOULDER]),
+    }
+
+
+def transform_landmarks(landmarks, M):
+    # Applies a 2x3 affine matrix (e.g. cv2.getRotationMatrix2D) to the pixel x, y of
+    # (..., 33, k) landmarks, as if the image had been warped with cv2.warpAffine.
+    # z is relative depth in image-width units, so it follows the matrix scale.
+    out = np.array(landmarks, copy=True)
+    M = np.asarray(M, dtype=np.float64)
+    xy = out[..., COL_X:COL_Y + 1].astype(np.float64)
+    out[..., COL_X:COL_Y + 1] = xy @ M[:, :2].T + M[:, 2]
+    out[..., COL_Z] *= np.sqrt(abs(np.linalg.det(M[:, :2])))
+    return out
+
+
+def angle_matrix(features):
+    # Stack the four model inputs from batch_features into an (N, 4) matrix
+    return np.column_stack([features[name] for name in ANGLE_FEATURES])
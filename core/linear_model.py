@@ -0,0 +1,76 @@
+import numpy as np
+
+# Pickle-free format for linear posture models (linear SVC / LinearSVC / LogisticRegression,
+# optionally behind a StandardScaler). Stored with np.savez as a few small arrays:
+#   coef (n_features,), intercept (), classes (2,), feature_names (n_features,),
+#   mean / scale (n_features,) of the scaler (0 / 1 without one)
+# Loading needs NumPy only, so sklearn is not imported at runtime.
+FORMAT_VERSION = 1
+
+class LinearPostureModel:
+    def __init__(self, coef, intercept, classes, feature_names, mean=None, scale=None):
+        coef = np.asarray(coef, dtype=np.float64).ravel()
+        self.coef = coef
+        self.intercept = float(intercept)
+        self.classes = np.asarray(classes)
+        self.feature_names = [str(name) for name in feature_names]
+        self.mean = np.zeros_like(coef) if mean is None else np.asarray(mean, dtype=np.float64)
+        self.scale = np.ones_like(coef) if scale is None else np.asarray(scale, dtype=np.float64)
+
+        # Fold the scaler into the weights: ((x - mean) / scale) . coef + b == x . w + b'
+        self.weights = coef / self.scale
+        self.bias = self.intercept - float(np.dot(self.mean, self.weights))
+
+    def predict_with_confidence(self, x):
+        # x: one feature vector in feature_names order -> (label, confidence).
+        # One dot product gives the decision value: its sign picks the class and
+        # confidence = sigmoid(|decision|), the same value predict_proba gives for
+        # logistic regression and the usual proxy for an SVM's margin.
+        decision = float(np.dot(self.weights, np.ravel(x))) + self.bias
+        label = self.classes[1] if decision > 0 else self.classes[0]
+        return label.item(), 1 / (1 + np.exp(-abs(decision)))
+
+    def predict(self, X):
+        # sklearn-style batch prediction, (N, n_features) -> (N,) labels
+        decision = np.asarray(X, dtype=np.float64) @ self.weights + self.bias
+        return np.where(decision > 0, self.classes[1], self.classes[0])
+
+    def save(self, path):
+        # np.savez adds .npz when path doesn't end with it
+        np.savez(path, format_version=FORMAT_VERSION, coef=self.coef, intercept=self.intercept,
+                 classes=self.classes, feature_names=np.asarray(self.feature_names, dtype=str),
+                 mean=self.mean, scale=self.scale)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['format_version']) > FORMAT_VERSION:
+                raise ValueError(f"{path}: unsupported model format {int(data['format_version'])}")
+            return cls(data['coef'], data['intercept'], data['classes'], data['feature_names'],
+                       data['mean'], data['scale'])
+
+    @classmethod
+    def from_sklearn(cls, model, feature_names=None):
+        # Converts a fitted binary linear estimator (or Pipeline(StandardScaler, estimator)).
+        # Raises ValueError for anything that isn't linear (e.g. an RBF SVC).
+        mean = scale = None
+        if hasattr(model, 'steps'): # Pipeline
+            *transforms, (_, model) = model.steps
+            for _, step in transforms:
+                # A single StandardScaler is supported (with_mean / with_std leave None)
+                if type(step).__name__ != 'StandardScaler' or mean is not None:
+                    raise ValueError(f"Unsupported pipeline step: {type(step).__name__}")
+                n = step.n_features_in_
+                mean = step.mean_ if step.mean_ is not None else np.zeros(n)
+                scale = step.scale_ if step.scale_ is not None else np.ones(n)
+
+        if getattr(model, 'kernel', 'linear') != 'linear' or not hasattr(model, 'coef_'):
+            raise ValueError(f"{type(model).__name__} is not a linear model")
+        if len(model.classes_) != 2:
+            raise ValueError("Only binary models can be exported")
+        if feature_names is None:
+            feature_names = getattr(model, 'feature_names_in_', None)
+        if feature_names is None:
+            raise ValueError("Feature names unknown; pass feature_names")
+        return cls(np.asarray(model.coef_).ravel(), np.ravel(model.intercept_)[0], model.classes_,
+                   feature_names, mean, scale)
@@ -0,0 +1,40 @@
+import time
+import cv2
+
+class MotionGate:
+    # Cheap "did anything move?" check run before pose inference.
+    # The frame is shrunk to a thumbnail and compared (mean absolute gray difference)
+    # with the thumbnail of the last frame that went through inference, so slow drift
+    # still adds up to motion. max_stale_seconds forces a fresh inference regularly.
+    def __init__(self, threshold=2.0, max_stale_seconds=1.0, size=(64, 36)):
+        self.threshold = threshold
+        self.max_stale_seconds = max_stale_seconds
+        self.size = size
+        self.reference = None
+        self.reference_time = 0.0
+        self.skipped = 0
+
+    def thumbnail(self, frame):
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    def needs_inference(self, frame, now=None):
+        # True: run the detector (and this frame becomes the new reference).
+        # False: the scene is static, reuse the previous result.
+        now = time.time() if now is None else now
+        small = self.thumbnail(frame)
+
+        if (self.reference is not None
+                and now - self.reference_time < self.max_stale_seconds
+                and cv2.absdiff(small, self.reference).mean() < self.threshold):
+            self.skipped += 1
+            return False
+
+        self.reference = small
+        self.reference_time = now
+        return True
+
+    def reset(self):
+        self.reference = None
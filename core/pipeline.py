@@ -0,0 +1,60 @@
+import threading
+import time
+
+class LatestFrameSlot:
+    # Single-item hand-off between pipeline stages. put() overwrites whatever is there,
+    # so a slow consumer always gets the freshest item and stale ones are dropped.
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.item = None
+        self.seq = 0
+        self.taken_seq = 0
+        self.dropped = 0 # items overwritten before anyone took them
+        self.closed = False
+
+    def put(self, item):
+        with self.cond:
+            if self.seq > self.taken_seq:
+                self.dropped += 1
+            self.item = item
+            self.seq += 1
+            self.cond.notify_all()
+
+    def get(self, last_seq=0, timeout=None):
+        # Waits for an item newer than last_seq. Returns (seq, item), or (last_seq, None)
+        # on timeout / close.
+        with self.cond:
+            self.cond.wait_for(lambda: self.seq > last_seq or self.closed, timeout)
+            if self.seq <= last_seq:
+                return last_seq, None
+            self.taken_seq = self.seq
+            return self.seq, self.item
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+class FrameGrabber(threading.Thread):
+    # Capture stage: reads the camera as fast as it delivers frames and keeps only
+    # the newest one in a LatestFrameSlot, so the camera buffer never fills up with
+    # stale frames while inference is busy.
+    def __init__(self, cap, slot=None):
+        super().__init__(daemon=True)
+        self.cap = cap
+        self.slot = slot or LatestFrameSlot()
+        self.running = True
+
+    def run(self):
+        while self.running:
+            ret, frame = self.cap.read()
+            if not ret:
+                time.sleep(0.01)
+                continue
+            # (frame, capture time) so later stages can report end-to-end latency
+            self.slot.put((frame, time.time()))
+        self.slot.close()
+
+    def stop(self):
+        self.running = False
+        self.join()
@@ -1,107 +1,123 @@
 import cv2
 import time
-import pickle
 import numpy as np
 import threading
-import os
-import winsound
-from collections import deque, Counter
+try:
+    import winsound
+except ImportError: # not on Windows: alerts are silent
+    winsound = None
+from datetime import datetime
+from collections import deque, Counter, namedtuple
 from .detector import PoseDetector
-from database.db_manager import DatabaseManager
+from .classifier import PostureClassifier
+from .motion import MotionGate
+from .complexity import ComplexityController
+from .timeline import PostureTimeline
+import config
+
+# What to draw for one processed frame, kept so it can be drawn later at any resolution
+Overlay = namedtuple('Overlay', 'pose_landmarks roi frame_width lm_list label features')
+
+# Result of pose inference + classification for one frame. lm_list is a copy (empty
+# (0, 5) when nobody was found); pose_landmarks / roi are what draw_pose needs.
+Detection = namedtuple('Detection', 'lm_list label confidence features pose_landmarks roi')
+
+def detect_posture(detector, classifier, frame, complexity=None):
+    # Runs one detector + classifier on frame -> Detection
+    if complexity:
+        complexity.timed(detector.find_pose, frame, False)
+    else:
+        detector.find_pose(frame, draw=False)
+    lm_list = detector.find_position(frame)
+    label, confidence, features = "Unknown", 0.0, None
+    if len(lm_list) != 0:
+        label, confidence, features = classifier.classify(lm_list)
+    return Detection(lm_list.copy(), label, confidence, features,
+                     detector.results.pose_landmarks, detector.result_roi)
+
+# Rendering policies (see HealthProcessor.render):
+#   'frame': annotate the frame returned by process_frame (full resolution)
+#   'lazy':  leave the frame untouched; draw_overlay() annotates a display copy on demand
+#   'off':   no drawing at all (headless / preview hidden)
+RENDER_MODES = ('frame', 'lazy', 'off')
 
 class HealthProcessor:
-    def __init__(self, model_path="data/posture_model.pkl", db_manager=None, user_id=1):
-        self.detector = PoseDetector()
+    # Posture monitoring for one stream. backend=None: owns its MediaPipe graph and model.
+    # backend=InferenceBackend (see engine.py): only keeps the per-stream session state
+    # (smoothing, alerts, timeline, ROI) and shares the backend's detectors and model.
+    def __init__(self, model_path="data/posture_model.pkl", db_manager=None, user_id=1,
+                 motion_gate=config.MOTION_GATE_ENABLED, adaptive_complexity=config.ADAPTIVE_COMPLEXITY,
+                 render='frame', sound=True, backend=None):
+        self.backend = backend
+        self.detector = None
+        self.complexity = None
+        self.roi = None # this stream's ROI while inference runs on the backend
+        if backend:
+            self.classifier = backend.classifier
+        else:
+            self.detector = PoseDetector(roi_tracking=config.POSE_ROI_TRACKING)
+            # Adaptive model complexity: holds the configured FPS / CPU budget
+            if adaptive_complexity:
+                self.complexity = ComplexityController(self.detector, config.TARGET_FPS, config.INFERENCE_CPU_BUDGET)
+            self.classifier = PostureClassifier(model_path)
+        self.model = self.classifier.model
+        self.model_loaded = self.classifier.model_loaded
         self.db = db_manager
         self.user_id = user_id
-        
-        # Load Model
-        if os.path.exists(model_path):
-            with open(model_path, 'rb') as f:
-                self.model = pickle.load(f)
-            self.model_loaded = True
-        else:
-            print(f"Model not found at {model_path}. Using fallback logic.")
-            self.model = None
-            self.model_loaded = False
 
         # State
         self.bad_posture_start_time = None
         self.alert_threshold = 30 # seconds
+        self.sound = sound
+        self.alerts = 0 # alerts triggered so far
         self.is_bad_posture = False
         self.last_log_time = time.time()
         
         # Time-Series Analysis (Temporal Smoothing)
         self.pose_history = deque(maxlen=15)
         self.smoothed_label = "Unknown"
+
+        # Motion gate: skip pose inference on static frames, reusing the last result
+        self.motion_gate = None
+        if motion_gate:
+            self.motion_gate = MotionGate(config.MOTION_GATE_THRESHOLD, config.MOTION_GATE_MAX_STALE_SECONDS)
+        self.last_result = None # Detection of the last inference
+
+        # Run-length encoded posture timeline, written to the database segment by segment
+        self.timeline = PostureTimeline(self.log_segment, config.TIMELINE_MIN_SEGMENT_SECONDS)
+        self.model_confidence = 0.0
+
+        self.render = None
+        self.set_render(render)
+        self.overlay = None # Overlay of the last processed frame ('lazy' mode)
+
+    def set_render(self, render):
+        # Can be switched at any time, e.g. to 'off' while the preview is hidden
+        if render not in RENDER_MODES:
+            raise ValueError(f"Unknown render mode '{render}', use one of {RENDER_MODES}")
+        self.render = render
         
-    def process_frame(self, frame):
-        # 1. Detect
-        frame = self.detector.find_pose(frame)
-        lm_list = self.detector.find_position(frame)
+    def process_frame(self, frame, now=None):
+        # now: frame time in seconds (default: wall clock). Recorded video passes its own
+        # timestamps so alerts, the motion gate and the timeline follow video time.
+        now = time.time() if now is None else now
+
+        # 1. Detect + Classify, unless the motion gate says nothing moved since the
+        #    last inference: then the previous landmarks and label are reused.
+        if (self.motion_gate is None or self.last_result is None
+                or self.motion_gate.needs_inference(frame, now)):
+            # Drawing is done below (or later, by draw_overlay) according to self.render
+            if self.backend:
+                self.last_result, self.roi = self.backend.detect(frame, self.roi)
+            else:
+                self.last_result = detect_posture(self.detector, self.classifier, frame, self.complexity)
+            if len(self.last_result.lm_list) != 0:
+                self.model_confidence = self.last_result.confidence
+        lm_list, instant_label, features = self.last_result.lm_list, self.last_result.label, self.last_result.features
         
-        instant_label = "Unknown"
         confidence = 0.0
 
         if len(lm_list) != 0:
-            # 2. Base Features & Expert Metrics
-            features = self.extract_features(lm_list)
-            
-            # --- Expert System Metrics ---
-            slope = self.detector.calculate_shoulder_slope(lm_list)
-            deviation = self.detector.calculate_head_deviation(lm_list)
-            
-            # 3D Depth (Forward Head)
-            ear_z = (self.detector.get_landmark_z(lm_list, 7) + self.detector.get_landmark_z(lm_list, 8)) / 2
-            shoulder_z = (self.detector.get_landmark_z(lm_list, 11) + self.detector.get_landmark_z(lm_list, 12)) / 2
-            z_diff = ear_z - shoulder_z
-            
-            # Rotation
-            l_11_z, r_12_z = self.detector.get_landmark_z(lm_list, 11), self.detector.get_landmark_z(lm_list, 12)
-            body_rotation = abs(l_11_z - r_12_z)
-            is_frontal = body_rotation < 0.20
-
-            # --- HYBRID LOGIC: Model First, Expert Second ---
-            model_prediction = 1 # Default to Good
-            
-            if self.model_loaded:
-                # 1. Verify with Trained Model (The Authority)
-                feat_vector = np.array([[ 
-                    features['left_neck_incline'], features['right_neck_incline'],
-                    features['left_torso_incline'], features['right_torso_incline']
-                ]])
-                model_prediction = self.model.predict(feat_vector)[0]
-                
-                # Calculate Confidence
-                if hasattr(self.model, "predict_proba"):
-                    confidence = max(self.model.predict_proba(feat_vector)[0])
-                elif hasattr(self.model, "decision_function"):
-                    dist = abs(self.model.decision_function(feat_vector)[0])
-                    confidence = 1 / (1 + np.exp(-dist))
-            
-            # --- Final Decision & Labeling ---
-            
-            if model_prediction == 0: # Model says BAD
-                # Use Geometry to diagnose WHY it is bad
-                if is_frontal and abs(slope) > 30:
-                    instant_label = "Leaning Right" if slope > 0 else "Leaning Left"
-                elif is_frontal and abs(deviation) > 0.20:
-                    instant_label = "Head Not Centered"
-                elif is_frontal and z_diff < -0.15:
-                    instant_label = "Forward Head"
-                else:
-                    instant_label = "Slouching" # Generic Bad from Model
-            
-            else: # Model says GOOD
-                # SAFETY NET: Did the Model miss a 3D Forward Head issue?
-                # (SVM only sees 2D angles, so it often misses pure Z-axis movement)
-                if is_frontal and z_diff < -0.20: # Use safe hard threshold for "Extreme" forward head
-                    instant_label = "Forward Head (3D)"
-                    model_prediction = 0 # Force Bad
-                else:
-                    instant_label = "Good"
-                    if not is_frontal: instant_label = "Good (Side)"
-
             # --- Temporal Smoothing (Time-Series) ---
             self.pose_history.append(instant_label)
             if len(self.pose_history) > 5:
@@ -116,83 +132,94 @@ class HealthProcessor:
             if "Good" not in self.smoothed_label and self.smoothed_label != "Unknown":
                 if not self.is_bad_posture:
                     self.is_bad_posture = True
-                    self.bad_posture_start_time = time.time()
+                    self.bad_posture_start_time = now
                 
-                if self.bad_posture_start_time and (time.time() - self.bad_posture_start_time > self.alert_threshold):
-                    self.trigger_alert()
+                if self.bad_posture_start_time and (now - self.bad_posture_start_time > self.alert_threshold):
+                    self.trigger_alert(now)
             else:
                 self.is_bad_posture = False
                 self.bad_posture_start_time = None
 
-            # Visuals
-            color = (0, 0, 255) if "Good" not in self.smoothed_label else (0, 255, 0)
-            self.draw_debug_overlay(frame, lm_list, color)
-            
-            # Debug Stats
-            cv2.putText(frame, f"Z-Diff: {z_diff:.2f}", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,255), 2)
-            cv2.putText(frame, f"Rot: {body_rotation:.2f}", (10, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,255), 2)
-            if not self.model_loaded:
-                cv2.putText(frame, "NO MODEL - USING HEURISTICS", (10, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,0,255), 2)
+        # Visuals
+        if self.render != 'off':
+            # Snapshot of this frame's results (the detector buffers are reused next frame)
+            self.overlay = Overlay(self.last_result.pose_landmarks, self.last_result.roi,
+                                   frame.shape[1], lm_list, self.smoothed_label, features)
+            if self.render == 'frame':
+                self.draw_overlay(frame)
+
+        # Timeline of smoothed states; "Unknown" while nobody is detected
+        self.timeline.update(self.smoothed_label if len(lm_list) != 0 else "Unknown", now)
 
         return frame, self.smoothed_label, confidence
 
-    def draw_debug_overlay(self, img, lm_list, color):
+    def stats_text(self):
+        # Extra info for the GUI stats line
+        return self.complexity.report() if self.complexity else ""
+
+    def draw_overlay(self, img, overlay=None):
+        # Draws the skeleton, debug lines and stats of `overlay` (default: the last
+        # processed frame) onto img, which may be a resized copy of that frame
+        overlay = overlay or self.overlay
+        if overlay is None:
+            return img
+        if len(overlay.lm_list) == 0:
+            return img
+        scale = img.shape[1] / overlay.frame_width
+        (self.backend or self.detector).draw_pose(img, overlay.pose_landmarks, overlay.roi, scale)
+
+        color = (0, 0, 255) if "Good" not in overlay.label else (0, 255, 0)
+        self.draw_debug_overlay(img, overlay.lm_list, color, scale)
+
+        # Debug Stats
+        features = overlay.features
+        cv2.putText(img, f"Z-Diff: {features['z_diff']:.2f}", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,255), 2)
+        cv2.putText(img, f"Rot: {features['body_rotation']:.2f}", (10, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,255), 2)
+        if not self.model_loaded:
+            cv2.putText(img, "NO MODEL - USING HEURISTICS", (10, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,0,255), 2)
+        return img
+
+    def draw_debug_overlay(self, img, lm_list, color, scale=1.0):
         try:
+            # lm_list holds float pixel coords; cv2 drawing needs ints
+            pts = (lm_list[:, 1:3] * scale).astype(np.int32).tolist()
+
             # 1. Shoulder Line
-            x11, y11 = lm_list[11][1], lm_list[11][2]
-            x12, y12 = lm_list[12][1], lm_list[12][2]
+            x11, y11 = pts[11]
+            x12, y12 = pts[12]
             cv2.line(img, (x11, y11), (x12, y12), color, 2)
             
             # 2. Shoulder Center
             center_x, center_y = (x11 + x12) // 2, (y11 + y12) // 2
             
             # 3. Nose Connection
-            nose_x, nose_y = lm_list[0][1], lm_list[0][2]
+            nose_x, nose_y = pts[0]
             cv2.line(img, (center_x, center_y), (nose_x, nose_y), (255, 255, 0), 2)
             cv2.circle(img, (nose_x, nose_y), 5, (255, 255, 0), cv2.FILLED)
             
             # 4. Vertical Reference
-            cv2.line(img, (center_x, center_y), (center_x, center_y - 100), (200, 200, 200), 1, cv2.LINE_AA)
+            cv2.line(img, (center_x, center_y), (center_x, center_y - int(100 * scale)), (200, 200, 200), 1, cv2.LINE_AA)
         except:
             pass
 
-    def extract_features(self, lm_list):
-        def get_coords(idx): return [lm_list[idx][1], lm_list[idx][2]]
-        
-        l_shoulder = get_coords(11)
-        r_shoulder = get_coords(12)
-        l_ear = get_coords(7)
-        r_ear = get_coords(8)
-        l_hip = get_coords(23)
-        r_hip = get_coords(24)
-        
-        l_hip_vert = [l_hip[0], l_hip[1] - 100]
-        r_hip_vert = [r_hip[0], r_hip[1] - 100]
+    def trigger_alert(self, now=None):
+        # Posture time itself is logged by the timeline (log_segment), not per alert
+        self.alerts += 1
+        if self.sound:
+            threading.Thread(target=self.play_sound).start()
+        self.bad_posture_start_time = time.time() if now is None else now
 
-        left_neck = self.detector.calculate_angle(l_ear, l_shoulder, l_hip)
-        right_neck = self.detector.calculate_angle(r_ear, r_shoulder, r_hip)
-        left_torso = self.detector.calculate_angle(l_shoulder, l_hip, l_hip_vert)
-        right_torso = self.detector.calculate_angle(r_shoulder, r_hip, r_hip_vert)
-        
-        return {
-            'left_neck_incline': left_neck, 
-            'right_neck_incline': right_neck,
-            'left_torso_incline': left_torso, 
-            'right_torso_incline': right_torso
-        }
-
-    def trigger_alert(self):
-        threading.Thread(target=self.play_sound).start()
+    def log_segment(self, label, start, end):
+        # One run-length encoded timeline segment -> one posture_logs row
+        # (timestamp = segment start, duration = its length)
         if self.db:
-            # Check if text is too long for DB column, though 'bad' is short.
-            # Using the specific label might be nice, but schema says varchar(20)
-            # 'Forward Head' is 12 chars. Safe.
-            label_to_log = self.smoothed_label if self.smoothed_label != "Unknown" else "bad"
-            # Ensure we don't exceed schema limits just in case
-            if len(label_to_log) > 20: label_to_log = "bad"
-                
-            self.db.log_posture(self.user_id, label_to_log, 30)
-            self.bad_posture_start_time = time.time() 
+            # Ensure we don't exceed schema limits (varchar(20)) just in case
+            label_to_log = label if len(label) <= 20 else label[:20]
+            self.db.log_posture(self.user_id, label_to_log, end - start, datetime.fromtimestamp(start))
+
+    def end_session(self, now=None):
+        # Monitoring stopped: close the open timeline segment
+        self.timeline.close(now)
 
     def play_sound(self):
         try:
@@ -0,0 +1,39 @@
+import time
+import threading
+from contextlib import contextmanager
+
+# Startup timing profile: import this first (see main.py) so the clock starts with
+# the process, then record sections and milestones as they happen, e.g.
+#   with startup.timed("import mediapipe"): import mediapipe
+#   startup.mark("window shown")
+# report() lists everything in order of completion, so slow imports or a regression
+# in time-to-first-frame show up in the console on every start.
+T0 = time.perf_counter()
+_lock = threading.Lock()
+_events = [] # (seconds since T0 at the end, name, duration or None for marks, thread name)
+
+def elapsed():
+    return time.perf_counter() - T0
+
+def mark(name):
+    with _lock:
+        _events.append((elapsed(), name, None, threading.current_thread().name))
+
+@contextmanager
+def timed(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        with _lock:
+            _events.append((end - T0, name, end - start, threading.current_thread().name))
+
+def report():
+    with _lock:
+        events = sorted(_events)
+    lines = ["Startup profile (s since start | duration | thread)"]
+    for at, name, duration, thread in events:
+        took = f"{duration:7.3f}" if duration is not None else "      -"
+        lines.append(f"  {at:7.3f} | {took} | {thread:<12} {name}")
+    return "\n".join(lines)
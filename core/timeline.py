@@ -0,0 +1,70 @@
+import time
+from datetime import datetime
+
+def is_good_label(label):
+    # "Good", "Good (Side)" and the legacy 'good' rows
+    return "good" in label.lower()
+
+def is_bad_label(label):
+    # Anything that isn't good posture or "nobody detected"
+    return not is_good_label(label) and label != "Unknown"
+
+class PostureTimeline:
+    # Run-length encodes the smoothed posture label stream into segments
+    # (label, start, end) - one row per state change instead of one per frame.
+    # min_segment_seconds debounces flicker: a new label must hold that long before it
+    # counts, and the change is then dated back to when it first appeared.
+    # Segments are also cut at every full hour so hourly rollups stay exact; consecutive
+    # pieces with the same label simply join back up when reconstructing.
+    def __init__(self, on_segment, min_segment_seconds=2.0):
+        self.on_segment = on_segment # called with (label, start, end), times in epoch seconds
+        self.min_segment_seconds = min_segment_seconds
+        self.label = None
+        self.start = None
+        self.pending_label = None
+        self.pending_since = None
+
+    def update(self, label, now=None):
+        now = time.time() if now is None else now
+        if self.label is None:
+            self.label, self.start = label, now
+            return
+
+        self.split_hours(now)
+
+        if label == self.label:
+            self.pending_label = None
+            return
+        if label != self.pending_label:
+            self.pending_label, self.pending_since = label, now
+        if now - self.pending_since >= self.min_segment_seconds:
+            self.emit(self.pending_since)
+            self.label, self.start = self.pending_label, self.pending_since
+            self.pending_label = None
+
+    def split_hours(self, now):
+        # Emits the finished hours of a long segment
+        while True:
+            start = datetime.fromtimestamp(self.start)
+            next_hour = start.replace(minute=0, second=0, microsecond=0).timestamp() + 3600
+            # Don't cut while a change is pending: it may still be dated before the boundary
+            if now < next_hour or (self.pending_label is not None and self.pending_since < next_hour):
+                return
+            self.emit(next_hour)
+            self.start = next_hour
+
+    def emit(self, end):
+        if end > self.start:
+            self.on_segment(self.label, self.start, end)
+
+    def close(self, now=None):
+        # Ends the current segment (monitoring stopped / shutdown)
+        if self.label is not None:
+            now = time.time() if now is None else now
+            if self.pending_label is not None:
+                self.emit(self.pending_since)
+                self.label, self.start = self.pending_label, self.pending_since
+            self.split_hours(now)
+            self.emit(now)
+        self.label = None
+        self.pending_label = None
@@ -0,0 +1,26 @@
+import sys
+import os
+import pickle
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.geometry import ANGLE_FEATURES
+from core.classifier import weights_path
+from core.linear_model import LinearPostureModel
+
+# Converts an existing pickled linear model (e.g. one trained before weights were
+# exported automatically) into the NumPy-only .npz format next to it:
+#   python data_pipeline/export_model.py [data/posture_model.pkl]
+
+def export_model(model_file):
+    with open(model_file, 'rb') as f:
+        model = pickle.load(f)
+    linear = LinearPostureModel.from_sklearn(model, getattr(model, 'feature_names_in_', ANGLE_FEATURES))
+    out_file = weights_path(model_file)
+    linear.save(out_file)
+    print(f"Weights saved to {out_file}")
+    return out_file
+
+if __name__ == "__main__":
+    export_model(sys.argv[1] if len(sys.argv) > 1 else "data/posture_model.pkl")
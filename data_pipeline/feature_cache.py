@@ -0,0 +1,59 @@
+import hashlib
+import os
+import pickle
+
+# Bump when the stored landmark layout changes (see PoseDetector.find_position)
+CACHE_VERSION = 1
+
+class LandmarkCache:
+    # Persistent landmark cache for feature extraction.
+    # Key: hash of (detector settings, image bytes) -> value: (33, 5) landmarks or None (no pose).
+    # Features are cheap to recompute from landmarks, so only the MediaPipe output is stored.
+    def __init__(self, cache_file="data/landmark_cache.pkl", detector_settings=None):
+        self.cache_file = cache_file
+        settings = sorted((detector_settings or {}).items())
+        self.settings_tag = f"v{CACHE_VERSION}:{settings}".encode()
+        self.entries = {}
+        self.used_keys = set()
+        self.load()
+
+    def load(self):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'rb') as f:
+                self.entries = pickle.load(f)
+        except Exception as e:
+            print(f"Ignoring unreadable landmark cache {self.cache_file}: {e}")
+            self.entries = {}
+
+    def save(self):
+        if not self.cache_file:
+            return
+        # Only keep entries for images seen in this run so the cache tracks the dataset
+        # (so modes that see different images, e.g. --stream, need their own cache file)
+        self.entries = {k: v for k, v in self.entries.items() if k in self.used_keys}
+        os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+        tmp_file = self.cache_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(self.entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, self.cache_file)
+
+    def key_for_file(self, img_path, extra=''):
+        # extra: anything else the cached result depends on (e.g. augmentation settings)
+        h = hashlib.sha1(self.settings_tag + extra.encode())
+        with open(img_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        return h.hexdigest()
+
+    def lookup(self, key):
+        # Returns (found, landmarks)
+        self.used_keys.add(key)
+        if key in self.entries:
+            return True, self.entries[key]
+        return False, None
+
+    def store(self, key, landmarks):
+        self.used_keys.add(key)
+        self.entries[key] = landmarks
@@ -7,99 +7,254 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from core.detector import PoseDetector
+from core.geometry import ANGLE_FEATURES, batch_features, transform_landmarks
+from data_pipeline.feature_cache import LandmarkCache
+from data_pipeline.feature_store import save_feature_store
 
 import cv2
 import pandas as pd
 import numpy as np
+from multiprocessing import Pool
+
+# Detector settings for extraction (also part of the landmark cache key)
+DETECTOR_SETTINGS = {'static_image_mode': True, 'model_complexity': 1}
+
+# Per-process state for parallel extraction (one MediaPipe graph per worker)
+_worker_detector = None
+_worker_preprocessor = None
+
+def _init_worker(preprocessor=None):
+    global _worker_detector, _worker_preprocessor
+    _worker_detector = PoseDetector(**DETECTOR_SETTINGS)
+    _worker_preprocessor = preprocessor
+
+def _detect_worker(item):
+    return run_task(_worker_detector, _worker_preprocessor, item)
+
+def run_task(detector, preprocessor, item):
+    # File mode: item is an image path -> landmarks or None
+    # Stream mode: item is a preprocessor source -> [(suffix, landmarks or None)]
+    if preprocessor is None:
+        return detect_landmarks(detector, item)
+    return stream_source(detector, preprocessor, item)
+
+def detect_image(detector, img):
+    # Returns a (33, 5) landmark array for one image, or None if no pose
+    detector.find_pose(img, draw=False)
+    lm_list = detector.find_position(img)
+    if len(lm_list) == 0:
+        return None
+    return lm_list.copy() # find_position reuses its buffer
+
+def detect_landmarks(detector, img_path):
+    img = cv2.imread(img_path)
+    if img is None:
+        return None
+    return detect_image(detector, img)
+
+def stream_source(detector, preprocessor, source):
+    # Augments one raw image in memory and detects every variant, no JPEG round trip.
+    # Variants are only written to disk when the preprocessor has an output_dir (debugging).
+    img_path, cat, base_name = source
+    img = cv2.imread(img_path)
+    if img is None:
+        return []
+
+    # In landmark_augment mode only the photometric variants go through the detector
+    landmark_augment = preprocessor.landmark_augment
+    variants = []
+    for suffix, aug_img in preprocessor.augment(img, geometric=not landmark_augment):
+        if preprocessor.output_dir:
+            preprocessor.save_image(aug_img, cat, f"{base_name}_{suffix}")
+        variants.append((suffix, detect_image(detector, aug_img)))
+
+    if landmark_augment:
+        # Rotate / scale / shift the landmarks of the resized image analytically,
+        # keeping the row order of the image based augmentation (geometric before "bright")
+        base_lm = variants[0][1]
+        geometric = [(suffix, None if base_lm is None else transform_landmarks(base_lm, M))
+                     for suffix, M in preprocessor.landmark_transforms()]
+        variants[1:1] = geometric
+    return variants
 
 class FeatureExtractor:
-    def __init__(self, input_dir="data/processed", output_file="data/features.csv"):
+    def __init__(self, input_dir="data/processed", output_dir="data/feature_store", workers=1,
+                 cache_file="data/landmark_cache.pkl", csv_file=None):
         self.input_dir = input_dir
-        self.output_file = output_file
-        self.detector = PoseDetector(static_image_mode=True)
+        # Binary columnar store with raw landmarks + labels (see feature_store.py)
+        self.output_dir = output_dir
+        # Optional human-readable angle table (the old features.csv format)
+        self.csv_file = csv_file
+        # workers > 1: shard the files over a process pool, 0/None: one worker per core
+        self.workers = workers or os.cpu_count() or 1
+        self.detector = PoseDetector(**DETECTOR_SETTINGS) if self.workers == 1 else None
+        # Content-addressed landmark cache: only new / modified images go through MediaPipe
+        self.cache = LandmarkCache(cache_file, DETECTOR_SETTINGS) if cache_file else None
         self.categories = {'good': 1, 'bad': 0}
 
-    def process(self):
-        data = []
-        print("Starting Feature Extraction...")
-        
+    def list_samples(self):
+        # Sorted (img_path, label, filename) list, so row order is the same for any worker count
+        samples = []
         for cat, label in self.categories.items():
             path = os.path.join(self.input_dir, cat)
             if not os.path.exists(path):
                 print(f"Directory not found: {path}")
                 continue
-                
-            files = os.listdir(path)
-            total_files = len(files)
-            print(f"Extracting features from {cat} ({total_files} images)...")
-            
-            for i, file in enumerate(files):
-                if i % 50 == 0:
-                    print(f"  Processed {i}/{total_files}...", end='\r')
-                
-                img_path = os.path.join(path, file)
-                img = cv2.imread(img_path)
-                if img is None: continue
-                
-                # Detect Pose
-                self.detector.find_pose(img, draw=False)
-                lm_list = self.detector.find_position(img)
-                
-                if len(lm_list) != 0:
-                    features = self.extract_angles(lm_list)
-                    features['label'] = label
-                    features['filename'] = file
-                    data.append(features)
-                    
-        df = pd.DataFrame(data)
-        df.to_csv(self.output_file, index=False)
-        print(f"Features saved to {self.output_file}. Total samples: {len(df)}")
+
+            files = sorted(os.listdir(path))
+            print(f"Found {len(files)} images in {cat}")
+            samples.extend((os.path.join(path, file), label, file) for file in files)
+        return samples
+
+    def detect_all(self, items, preprocessor=None):
+        # Yields run_task results for every item, in input order
+        if not items:
+            return
+        if self.workers == 1:
+            for item in items:
+                yield run_task(self.detector, preprocessor, item)
+            return
+
+        # Small shards keep all workers busy until the end; imap keeps results in order
+        chunksize = max(1, min(32, len(items) // (self.workers * 8)))
+        with Pool(self.workers, initializer=_init_worker, initargs=(preprocessor,)) as pool:
+            yield from pool.imap(_detect_worker, items, chunksize=chunksize)
+
+    def detect_cached(self, items, preprocessor=None, cache_tag=''):
+        # (run_task results for every item in input order, indices of the cached ones)
+        results = [None] * len(items)
+        keys = None
+        todo = list(range(len(items)))
+        cached = []
+
+        if self.cache:
+            # Keyed by the content of the image file behind each item
+            img_paths = items if preprocessor is None else [source[0] for source in items]
+            keys = [self.cache.key_for_file(img_path, cache_tag) for img_path in img_paths]
+            todo = []
+            for i, key in enumerate(keys):
+                found, result = self.cache.lookup(key)
+                if found:
+                    results[i] = result
+                    cached.append(i)
+                else:
+                    todo.append(i)
+            print(f"Landmark cache: {len(items) - len(todo)} cached, {len(todo)} to detect")
+
+        for n, result in enumerate(self.detect_all([items[i] for i in todo], preprocessor)):
+            if n % 50 == 0:
+                print(f"  Processed {n}/{len(todo)}...", end='\r')
+            i = todo[n]
+            results[i] = result
+            if keys:
+                self.cache.store(keys[i], result)
+
+        if self.cache:
+            self.cache.save()
+        return results, cached
+
+    def process(self):
+        landmarks = []
+        labels = []
+        filenames = []
+        print(f"Starting Feature Extraction ({self.workers} worker(s))...")
+
+        samples = self.list_samples()
+        results, _ = self.detect_cached([img_path for img_path, _, _ in samples])
+
+        for i, lm_list in enumerate(results):
+            if lm_list is not None:
+                _, label, file = samples[i]
+                landmarks.append(lm_list)
+                labels.append(label)
+                filenames.append(file)
+
+        self.save(landmarks, labels, filenames)
+
+    def process_stream(self, preprocessor):
+        # Fused preprocess -> extract: raw images are augmented in memory and fed
+        # straight into pose detection. Gives the same rows in the same order as process()
+        # on the preprocessed tree, up to JPEG loss (that path decodes saved JPEGs, this
+        # one detects on the in-memory images, so landmarks differ slightly).
+        if preprocessor.landmark_augment and preprocessor.output_dir:
+            # The geometric variants only exist as landmarks, the saved tree would lack them
+            raise ValueError("landmark_augment streams without images; use output_dir=None")
+
+        rows = []
+        print(f"Starting Streaming Feature Extraction ({self.workers} worker(s))...")
+
+        sources = preprocessor.list_sources()
+        # Cached per raw image; every augmentation setting is part of the key, so changing
+        # one re-detects instead of returning the old variants
+        cache_tag = (f"stream:{preprocessor.target_size}:{preprocessor.geometric_augments}"
+                     f":bright{preprocessor.brightness}")
+        if preprocessor.landmark_augment:
+            cache_tag += ":landmarks"
+        results, cached = self.detect_cached(sources, preprocessor, cache_tag)
+
+        if preprocessor.output_dir:
+            # Cached sources skipped stream_source, which writes the images; write them here
+            for i in cached:
+                for cat, name, img in preprocessor.load_and_augment(sources[i]):
+                    preprocessor.save_image(img, cat, name)
+
+        category_order = {cat: i for i, cat in enumerate(self.categories)}
+        for (_, cat, base_name), variants in zip(sources, results):
+            for suffix, lm_list in variants:
+                if lm_list is not None:
+                    rows.append((category_order[cat], f"{base_name}_{suffix}.jpg", self.categories[cat], lm_list))
+
+        # process() lists each category directory sorted by filename
+        rows.sort(key=lambda row: row[:2])
+        self.save([row[3] for row in rows], [row[2] for row in rows], [row[1] for row in rows])
+
+    def save(self, landmarks, labels, filenames):
+        landmarks = np.stack(landmarks) if landmarks else np.zeros((0, 33, 5), dtype=np.float32)
+        save_feature_store(self.output_dir, landmarks, labels, filenames)
+        print(f"Landmarks saved to {self.output_dir}. Total samples: {len(landmarks)}")
+
+        if self.csv_file:
+            # Geometry for every sample in one vectorized pass
+            metrics = batch_features(landmarks)
+            df = pd.DataFrame({name: metrics[name] for name in ANGLE_FEATURES})
+            df['label'] = labels
+            df['filename'] = filenames
+            df.to_csv(self.csv_file, index=False)
+            print(f"Features saved to {self.csv_file}.")
 
     def extract_angles(self, lm_list):
         # MediaPipe Keypoints (0-32). relevant for sitting:
         # 11: left_shoulder, 12: right_shoulder
         # 23: left_hip,      24: right_hip
         # 7: left_ear,       8: right_ear
-        
-        # Helper to get coords
-        def get_coords(idx):
-             # lm_list[idx] = [id, x, y, z, visibility]
-            return [lm_list[idx][1], lm_list[idx][2]]
-
-        # Define points
-        l_shoulder = get_coords(11)
-        r_shoulder = get_coords(12)
-        l_ear = get_coords(7)
-        r_ear = get_coords(8)
-        l_hip = get_coords(23)
-        r_hip = get_coords(24)
-        
-        # Calculate key angles
-        # 1. Neck Angle (Ear-Shoulder vs Vertical) - rough approx
-        # Vertical reference point (shoulder x, shoulder y - 100)
-        
-        # Let's compute simpler geometric features:
-        # Angle: Ear - Shoulder - Hip
-        left_neck_incline = self.detector.calculate_angle(l_ear, l_shoulder, l_hip)
-        right_neck_incline = self.detector.calculate_angle(r_ear, r_shoulder, r_hip)
-        
-        # Angle: Shoulder - Hip - Vertical (Torso inclination)
-        # Vertical point from hip: (hip.x, hip.y - 100)
-        l_hip_vert = [l_hip[0], l_hip[1] - 100]
-        r_hip_vert = [r_hip[0], r_hip[1] - 100]
-        
-        left_torso_incline = self.detector.calculate_angle(l_shoulder, l_hip, l_hip_vert)
-        right_torso_incline = self.detector.calculate_angle(r_shoulder, r_hip, r_hip_vert)
-        
-        return {
-            'left_neck_incline': left_neck_incline,
-            'right_neck_incline': right_neck_incline,
-            'left_torso_incline': left_torso_incline,
-            'right_torso_incline': right_torso_incline,
-            # Add raw y-diffs relative to frame height might help too?
-            # normalized dist ear to shoulder?
-        }
+        # Neck: Ear - Shoulder - Hip, Torso: Shoulder - Hip - Vertical (see core/geometry.py)
+        metrics = batch_features(lm_list)
+        return {name: metrics[name][0] for name in ANGLE_FEATURES}
 
 if __name__ == "__main__":
-    extractor = FeatureExtractor()
-    extractor.process()
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (0 = one per CPU core)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore the landmark cache and re-detect every image")
+    parser.add_argument("--csv", metavar="FILE", help="Also write the angle features as CSV (e.g. data/features.csv)")
+    parser.add_argument("--stream", action="store_true", help="Augment data/raw in memory instead of reading data/processed")
+    parser.add_argument("--save-images", action="store_true", help="With --stream: also write the augmented images (debugging)")
+    parser.add_argument("--landmark-augment", action="store_true",
+                        help="With --stream: rotate landmarks instead of re-detecting rotated images")
+    args = parser.parse_args()
+    if args.save_images and args.landmark_augment:
+        parser.error("--save-images can't be combined with --landmark-augment (no rotated images are made)")
+
+    # One cache file per mode: each run drops the entries it didn't use (LandmarkCache.save)
+    cache_file = "data/landmark_cache_stream.pkl" if args.stream else "data/landmark_cache.pkl"
+    if args.no_cache:
+        cache_file = None
+    extractor = FeatureExtractor(workers=args.workers, cache_file=cache_file, csv_file=args.csv)
+    if args.stream:
+        # Read data/raw directly; data/processed is only written with --save-images
+        from data_pipeline.preprocess import DataPreprocessor
+        preprocessor = DataPreprocessor(output_dir="data/processed" if args.save_images else None,
+                                        landmark_augment=args.landmark_augment)
+        extractor.process_stream(preprocessor)
+    else:
+        extractor.process()
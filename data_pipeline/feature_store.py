@@ -0,0 +1,40 @@
+import os
+import numpy as np
+
+# Columnar feature store: one .npy file per column in a directory.
+#   landmarks.npy  float32 (N, 33, 5)  raw find_position output [id, x, y, z, visibility]
+#   labels.npy     int8    (N,)        1 = good, 0 = bad
+#   filenames.npy  str     (N,)        source image name
+# Derived features (angles etc.) are recomputed from the landmarks with core.geometry,
+# so new features never need another pose inference pass.
+COLUMNS = ['landmarks', 'labels', 'filenames']
+
+def save_feature_store(store_dir, landmarks, labels, filenames):
+    os.makedirs(store_dir, exist_ok=True)
+    landmarks = np.asarray(landmarks, dtype=np.float32).reshape(-1, 33, 5)
+    columns = {
+        'landmarks': landmarks,
+        'labels': np.asarray(labels, dtype=np.int8),
+        'filenames': np.asarray(filenames, dtype=str),
+    }
+    if not all(len(col) == len(landmarks) for col in columns.values()):
+        raise ValueError("Feature store columns must have the same length")
+
+    for name, col in columns.items():
+        # Write then rename, so a crash never leaves a half-written column behind
+        tmp_file = os.path.join(store_dir, f"{name}.tmp.npy")
+        np.save(tmp_file, col)
+        os.replace(tmp_file, os.path.join(store_dir, f"{name}.npy"))
+
+def load_feature_store(store_dir, mmap=True):
+    # mmap=True maps the numeric columns read-only instead of copying them into memory
+    mode = 'r' if mmap else None
+    store = {}
+    for name in COLUMNS:
+        path = os.path.join(store_dir, f"{name}.npy")
+        # Strings are not memory-mappable in a useful way; load them normally
+        store[name] = np.load(path, mmap_mode=None if name == 'filenames' else mode)
+    return store
+
+def store_exists(store_dir):
+    return all(os.path.exists(os.path.join(store_dir, f"{name}.npy")) for name in COLUMNS)
@@ -1,69 +1,166 @@
 import cv2
 import os
+import queue
+import threading
 import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 class DataPreprocessor:
-    def __init__(self, input_dir="data/raw", output_dir="data/processed", target_size=(256, 256)):
+    def __init__(self, input_dir="data/raw", output_dir="data/processed", target_size=(256, 256),
+                 landmark_augment=False, workers=1):
         self.input_dir = input_dir
         self.output_dir = output_dir
         self.target_size = target_size
         self.categories = ['good', 'bad']
+        # workers > 1: decode/augment on a thread pool (OpenCV releases the GIL) with
+        # prefetched reads and JPEG writes on separate writer threads. 0/None: one per core
+        self.workers = workers or os.cpu_count() or 1
+
+        # Geometric augmentations: (suffix, angle in degrees, scale, (tx, ty) shift in pixels)
+        self.geometric_augments = [
+            ("rot10", 10, 1.0, (0, 0)),
+            ("rot-10", -10, 1.0, (0, 0)),
+        ]
+        # Value added to the HSV brightness channel for the "bright" variant
+        self.brightness = 30
+        # landmark_augment=True (streaming only): geometric augmentations are applied to the
+        # landmarks of the resized image instead of warping the image and re-running the detector
+        self.landmark_augment = landmark_augment
         
-        for cat in self.categories:
-            os.makedirs(os.path.join(output_dir, cat), exist_ok=True)
+        # output_dir=None: in-memory only (streaming into FeatureExtractor.process_stream)
+        if output_dir:
+            for cat in self.categories:
+                os.makedirs(os.path.join(output_dir, cat), exist_ok=True)
 
-    def process(self):
-        print("Starting Data Preprocessing...")
+    def list_sources(self):
+        # Sorted (img_path, category, base_name) for every raw image
+        sources = []
         for cat in self.categories:
             path = os.path.join(self.input_dir, cat)
             if not os.path.exists(path):
                 print(f"Directory not found: {path}, skipping.")
                 continue
                 
-            files = os.listdir(path)
-            print(f"Processing {len(files)} images in '{cat}'...")
+            files = sorted(os.listdir(path))
+            print(f"Found {len(files)} images in '{cat}'...")
             
             for file in files:
                 if not file.lower().endswith(('.png', '.jpg', '.jpeg')):
                     continue
-                    
-                img_path = os.path.join(path, file)
-                img = cv2.imread(img_path)
-                
-                if img is None:
-                    continue
-                
-                # Resize
-                img_resized = cv2.resize(img, self.target_size)
-                
-                # Save original processed
                 base_name = os.path.splitext(file)[0]
-                self.save_image(img_resized, cat, f"{base_name}_resized")
-                
-                # Augment: Flip Horizontal (maybe not good for asymmetric posture? lets skip flip for now if direction matters, but usually for "bad" posture general detection it might be fine. Safe to skip if unsure.)
-                # Actually, "leaning" might be direction specific. Let's do rotation instead.
-                
-                # Augment: Rotation +/- 10 degrees
-                self.augment_rotation(img_resized, cat, base_name, 10)
-                self.augment_rotation(img_resized, cat, base_name, -10)
-                
-                # Augment: Brightness
-                self.augment_brightness(img_resized, cat, base_name, 30)
+                sources.append((os.path.join(path, file), cat, base_name))
+        return sources
 
-    def augment_rotation(self, img, category, base_name, angle):
-        h, w = img.shape[:2]
+    def augment(self, img, geometric=True):
+        # Returns [(suffix, image)] for one raw image, all in memory.
+        # Saved as f"{base_name}_{suffix}.jpg" by process().
+        # geometric=False leaves out the warped variants (see landmark_transforms).
+        # Resize
+        img_resized = cv2.resize(img, self.target_size)
+        variants = [("resized", img_resized)]
+        
+        # Augment: Flip Horizontal (maybe not good for asymmetric posture? lets skip flip for now if direction matters, but usually for "bad" posture general detection it might be fine. Safe to skip if unsure.)
+        # Actually, "leaning" might be direction specific. Let's do rotation instead.
+        # Augment: Rotation +/- 10 degrees
+        if geometric:
+            for suffix, M in self.landmark_transforms():
+                variants.append((suffix, self.warp(img_resized, M)))
+
+        # Augment: Brightness
+        variants.append(("bright", self.brighten(img_resized, self.brightness)))
+        return variants
+
+    def affine_matrix(self, angle=0, scale=1.0, shift=(0, 0)):
+        # 2x3 matrix for a rotation/scale about the image center plus a shift,
+        # used both to warp images and to move landmarks
+        w, h = self.target_size
         center = (w // 2, h // 2)
-        M = cv2.getRotationMatrix2D(center, angle, 1.0)
-        rotated = cv2.warpAffine(img, M, (w, h))
-        self.save_image(rotated, category, f"{base_name}_rot{angle}")
+        M = cv2.getRotationMatrix2D(center, angle, scale)
+        M[:, 2] += shift
+        return M
 
-    def augment_brightness(self, img, category, base_name, value):
+    def landmark_transforms(self):
+        # [(suffix, 2x3 matrix)] for the geometric augmentations of a target_size image
+        return [(suffix, self.affine_matrix(angle, scale, shift))
+                for suffix, angle, scale, shift in self.geometric_augments]
+
+    def iter_augmented(self, sources=None):
+        # Streams (category, base_name, suffix, image) without touching the disk
+        for img_path, cat, base_name in (sources if sources is not None else self.list_sources()):
+            img = cv2.imread(img_path)
+            if img is None:
+                continue
+            for suffix, aug_img in self.augment(img):
+                yield cat, base_name, suffix, aug_img
+
+    def load_and_augment(self, source):
+        # [(category, name, image)] for one raw image, [] if it cannot be read
+        img_path, cat, base_name = source
+        img = cv2.imread(img_path)
+        if img is None:
+            return []
+        return [(cat, f"{base_name}_{suffix}", aug_img) for suffix, aug_img in self.augment(img)]
+
+    def process(self):
+        print(f"Starting Data Preprocessing ({self.workers} worker(s))...")
+        if self.workers == 1:
+            for cat, base_name, suffix, img in self.iter_augmented():
+                self.save_image(img, cat, f"{base_name}_{suffix}")
+            return
+
+        sources = self.list_sources()
+        # Bounded queue: decoding can't run arbitrarily far ahead of the disk
+        write_queue = queue.Queue(maxsize=self.workers * 8)
+        errors = []
+        writers = [threading.Thread(target=self.write_worker, args=(write_queue, errors), daemon=True)
+                   for _ in range(max(1, self.workers // 2))]
+        for writer in writers:
+            writer.start()
+
+        try:
+            with ThreadPoolExecutor(self.workers) as pool:
+                # Prefetch: keep up to 2x workers images being read/augmented ahead of the writers
+                pending = deque()
+                for source in sources:
+                    pending.append(pool.submit(self.load_and_augment, source))
+                    if len(pending) >= self.workers * 2:
+                        for item in pending.popleft().result():
+                            write_queue.put(item)
+                while pending:
+                    for item in pending.popleft().result():
+                        write_queue.put(item)
+        finally:
+            # Flush: one stop marker per writer, then wait for the queue to drain
+            for _ in writers:
+                write_queue.put(None)
+            for writer in writers:
+                writer.join()
+
+        if errors:
+            print(f"{len(errors)} image(s) failed to save, first error: {errors[0]}")
+
+    def write_worker(self, write_queue, errors):
+        while True:
+            item = write_queue.get()
+            if item is None:
+                return
+            cat, name, img = item
+            try:
+                self.save_image(img, cat, name)
+            except Exception as e:
+                errors.append(e)
+
+    def warp(self, img, M):
+        h, w = img.shape[:2]
+        return cv2.warpAffine(img, M, (w, h))
+
+    def brighten(self, img, value):
         hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
         h, s, v = cv2.split(hsv)
         v = cv2.add(v, value) # OpenCV handles saturation automatically
         final_hsv = cv2.merge((h, s, v))
-        bright_img = cv2.cvtColor(final_hsv, cv2.COLOR_HSV2BGR)
-        self.save_image(bright_img, category, f"{base_name}_bright")
+        return cv2.cvtColor(final_hsv, cv2.COLOR_HSV2BGR)
 
     def save_image(self, img, category, name):
         filename = f"{self.output_dir}/{category}/{name}.jpg"
@@ -74,5 +171,10 @@ if __name__ == "__main__":
     if not os.path.exists("data/raw"):
         print("No input data found at data/raw. Please run collector.py first.")
     else:
-        preprocessor = DataPreprocessor()
+        import argparse
+        parser = argparse.ArgumentParser()
+        parser.add_argument("--workers", type=int, default=1, help="Worker threads (0 = one per CPU core)")
+        args = parser.parse_args()
+
+        preprocessor = DataPreprocessor(workers=args.workers)
         preprocessor.process()
@@ -1,36 +1,55 @@
-import pandas as pd
+import sys
 import pickle
+import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.svm import SVC
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 import os
 
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.geometry import ANGLE_FEATURES, angle_matrix, batch_features
+from core.classifier import weights_path
+from core.linear_model import LinearPostureModel
+from data_pipeline.feature_store import load_feature_store, store_exists
+
 class ModelTrainer:
-    def __init__(self, data_file="data/features.csv", model_file="data/posture_model.pkl"):
+    def __init__(self, data_file="data/feature_store", model_file="data/posture_model.pkl"):
+        # data_file: feature store directory (feature_extractor.py output) or a legacy features.csv
         self.data_file = data_file
         self.model_file = model_file
 
+    def load_data(self):
+        # Returns X (N, 4) in ANGLE_FEATURES order and y (N,)
+        if os.path.isdir(self.data_file):
+            store = load_feature_store(self.data_file)
+            # Angles are derived straight from the memory-mapped raw landmarks
+            X = angle_matrix(batch_features(store['landmarks']))
+            y = np.asarray(store['labels'])
+        else:
+            import pandas as pd
+            df = pd.read_csv(self.data_file)
+            X = df[ANGLE_FEATURES].to_numpy()
+            y = df['label'].to_numpy()
+
+        # Clean Data
+        valid = np.isfinite(X).all(axis=1)
+        return X[valid], y[valid]
+
     def train(self):
-        if not os.path.exists(self.data_file):
+        if not (store_exists(self.data_file) or os.path.isfile(self.data_file)):
             print(f"Data file {self.data_file} not found. Run feature_extractor.py first.")
             return
 
-        # Load Data
-        df = pd.read_csv(self.data_file)
+        # Load Data: Features (X) and Labels (y)
+        X, y = self.load_data()
         
-        # Clean Data
-        df.dropna(inplace=True)
-        
-        if len(df) < 10:
+        if len(X) < 10:
             print("Not enough data to train. Please collect more samples.")
             return
 
-        # Features (X) and Labels (y)
-        # Drop filename and label
-        X = df.drop(['label', 'filename'], axis=1)
-        y = df['label']
-
         # Splitting Dataset: 70% Train, 10% Val (implied in test split), 20% Test
         # First split: 80% Train+Val, 20% Test
         X_train_val, X_test, y_train_val, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
@@ -66,6 +85,8 @@ class ModelTrainer:
         with open(self.model_file, 'wb') as f:
             pickle.dump(model, f)
         print(f"Model saved to {self.model_file}")
+        # NumPy-only weights, loaded by the app instead of the pickle (no sklearn at runtime)
+        self.export_weights(model, self.model_file)
         
         # Save Model (Backup Version)
         from datetime import datetime
@@ -77,7 +98,25 @@ class ModelTrainer:
         with open(version_file, 'wb') as f:
             pickle.dump(model, f)
         print(f"Model backup saved to {version_file}")
+        self.export_weights(model, version_file)
+
+    def export_weights(self, model, model_file):
+        # Writes the .npz weights next to model_file (linear models only)
+        try:
+            linear = LinearPostureModel.from_sklearn(model, ANGLE_FEATURES)
+        except ValueError as e:
+            print(f"Weights not exported ({e}); the app will load the pickle.")
+            return
+        linear.save(weights_path(model_file))
+        print(f"Weights saved to {weights_path(model_file)}")
 
 if __name__ == "__main__":
-    trainer = ModelTrainer()
+    # Optional argument: feature store directory or CSV. Falls back to the legacy CSV
+    # when no feature store has been extracted yet.
+    if len(sys.argv) > 1:
+        data_file = sys.argv[1]
+    else:
+        data_file = "data/feature_store" if store_exists("data/feature_store") else "data/features.csv"
+
+    trainer = ModelTrainer(data_file=data_file)
     trainer.train()
@@ -0,0 +1,205 @@
+# CRITICAL: Import MediaPipe first
+import mediapipe as mp
+import sys
+import os
+import csv
+import json
+import time
+import hashlib
+from collections import Counter
+from multiprocessing import Pool
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import cv2
+import config
+from core.processor import HealthProcessor
+from core.timeline import is_good_label, is_bad_label
+
+# Offline analysis of recorded sessions: every frame of every file goes through
+# HealthProcessor as fast as the CPU allows (no display, no pacing), one file per
+# worker process. Frame times come from the video (index / fps), so smoothing, alerts
+# and the timeline behave as they would have live.
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm', '.m4v')
+SUMMARY_FIELDS = ['file', 'duration_seconds', 'frames', 'good_seconds', 'bad_seconds', 'unknown_seconds',
+                  'good_ratio', 'alerts', 'segments_count', 'processing_seconds', 'processing_fps', 'error']
+
+def _init_worker():
+    # One file per process already uses every core; keep OpenCV from spawning more threads
+    cv2.setNumThreads(1)
+
+def _analyze_worker(task):
+    return analyze_video(*task)
+
+def list_videos(paths):
+    # Video files from files and (recursively) directories, sorted
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                videos.extend(os.path.join(root, f) for f in files if f.lower().endswith(VIDEO_EXTENSIONS))
+        elif os.path.exists(path):
+            videos.append(path)
+        else:
+            print(f"Not found: {path}, skipping.")
+    return sorted(videos)
+
+def analyze_video(path, model_path=config.MODEL_PATH, frame_step=1, motion_gate=config.MOTION_GATE_ENABLED):
+    # Returns the stats dict for one file (see summarize); frame_step > 1 only decodes
+    # every frame_step-th frame
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        return {'file': path, 'error': "cannot open video"}
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if not fps or fps <= 0 or fps > 1000:
+        fps = 30.0 # missing / broken container metadata
+
+    # Fixed model complexity: adaptive switching would make results depend on machine load
+    processor = HealthProcessor(model_path=model_path, motion_gate=motion_gate, adaptive_complexity=False,
+                                render='off', sound=False)
+    segments = []
+    processor.timeline.on_segment = lambda label, start, end: segments.append((label, start, end))
+
+    per_second = [] # Counter of frame labels for each second of video
+    index = 0
+    frames = 0
+    start = time.perf_counter()
+    while True:
+        if index % frame_step:
+            # Skipped frames are only grabbed, not decoded
+            if not cap.grab():
+                break
+            index += 1
+            continue
+        ret, frame = cap.read()
+        if not ret:
+            break
+        t = index / fps
+        index += 1
+        frames += 1
+
+        _, label, _ = processor.process_frame(frame, t)
+        if len(processor.last_result.lm_list) == 0:
+            label = "Unknown" # nobody in the picture (same rule as the timeline)
+        second = int(t)
+        while len(per_second) <= second:
+            per_second.append(Counter())
+        per_second[second][label] += 1
+    cap.release()
+
+    duration = index / fps
+    processor.end_session(duration)
+    elapsed = time.perf_counter() - start
+    return summarize(path, duration, frames, elapsed, per_second, segments, processor.alerts)
+
+def summarize(path, duration, frames, elapsed, per_second, segments, alerts):
+    # Per-second timeline: the most frequent label within each second
+    timeline = [c.most_common(1)[0][0] if c else "Unknown" for c in per_second]
+
+    # Time per label from the debounced timeline segments
+    label_seconds = Counter()
+    for label, seg_start, seg_end in segments:
+        label_seconds[label] += seg_end - seg_start
+    good = sum(v for k, v in label_seconds.items() if is_good_label(k))
+    bad = sum(v for k, v in label_seconds.items() if is_bad_label(k))
+
+    return {
+        'file': path,
+        'duration_seconds': round(duration, 2),
+        'frames': frames,
+        'good_seconds': round(good, 2),
+        'bad_seconds': round(bad, 2),
+        'unknown_seconds': round(label_seconds.get("Unknown", 0.0), 2),
+        'good_ratio': round(good / (good + bad), 3) if good + bad > 0 else None,
+        'alerts': alerts,
+        'segments_count': len(segments),
+        'processing_seconds': round(elapsed, 2),
+        'processing_fps': round(frames / elapsed, 1) if elapsed > 0 else 0,
+        'label_seconds': {k: round(v, 2) for k, v in label_seconds.items()},
+        'segments': [[label, round(s, 2), round(e, 2)] for label, s, e in segments],
+        'timeline': timeline,
+    }
+
+class VideoAnalyzer:
+    def __init__(self, output_dir="data/video_analysis", workers=1, model_path=config.MODEL_PATH,
+                 frame_step=1, motion_gate=config.MOTION_GATE_ENABLED, force=False):
+        self.output_dir = output_dir
+        # Files are analysed in parallel, one per worker process. 0/None: one per core
+        self.workers = workers or os.cpu_count() or 1
+        self.model_path = model_path
+        self.frame_step = max(1, frame_step)
+        self.motion_gate = motion_gate
+        # force=False: skip files whose result is newer than both the video and the model,
+        # so an interrupted overnight run resumes and a new model reprocesses everything
+        self.force = force
+        os.makedirs(output_dir, exist_ok=True)
+
+    def result_file(self, path):
+        # Directories are walked recursively, so a/cam1.mp4 and b/cam1.mp4 can both occur:
+        # the file name is kept for readability, a hash of the absolute path keeps it unique
+        name = os.path.splitext(os.path.basename(path))[0]
+        digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:10]
+        return os.path.join(self.output_dir, f"{name}-{digest}.posture.json")
+
+    def is_up_to_date(self, path):
+        result = self.result_file(path)
+        if self.force or not os.path.exists(result):
+            return False
+        inputs = [path] + ([self.model_path] if os.path.exists(self.model_path) else [])
+        return os.path.getmtime(result) >= max(os.path.getmtime(p) for p in inputs)
+
+    def process(self, paths):
+        videos = list_videos(paths)
+        todo = [v for v in videos if not self.is_up_to_date(v)]
+        print(f"Analysing {len(todo)} of {len(videos)} video(s) with {self.workers} worker(s)...")
+        tasks = [(v, self.model_path, self.frame_step, self.motion_gate) for v in todo]
+
+        if self.workers == 1 or len(tasks) <= 1:
+            results = map(_analyze_worker, tasks)
+            self.collect(results, len(tasks))
+        else:
+            # Longest files are not known up front; unordered results keep every worker busy
+            with Pool(min(self.workers, len(tasks)), initializer=_init_worker) as pool:
+                self.collect(pool.imap_unordered(_analyze_worker, tasks), len(tasks))
+
+        self.write_summary(videos)
+
+    def collect(self, results, total):
+        for done, stats in enumerate(results, 1):
+            with open(self.result_file(stats['file']), 'w') as f:
+                json.dump(stats, f)
+            if stats.get('error'):
+                print(f"[{done}/{total}] {stats['file']}: {stats['error']}")
+            else:
+                print(f"[{done}/{total}] {stats['file']}: {stats['duration_seconds']}s of video, "
+                      f"good {stats['good_ratio']}, {stats['processing_fps']} fps")
+
+    def write_summary(self, videos):
+        # One row per file (including results kept from earlier runs)
+        summary_file = os.path.join(self.output_dir, "summary.csv")
+        with open(summary_file, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            for video in videos:
+                result = self.result_file(video)
+                if os.path.exists(result):
+                    with open(result) as rf:
+                        writer.writerow(json.load(rf))
+        print(f"Summary written to {summary_file}")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="+", help="Video files or directories")
+    parser.add_argument("--output", default="data/video_analysis", help="Directory for the per-file results")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (0 = one per CPU core)")
+    parser.add_argument("--model", default=config.MODEL_PATH, help="Posture model to use")
+    parser.add_argument("--frame-step", type=int, default=1, help="Analyse every Nth frame only")
+    parser.add_argument("--no-motion-gate", action="store_true", help="Run pose inference on every analysed frame")
+    parser.add_argument("--force", action="store_true", help="Re-analyse files that already have up-to-date results")
+    args = parser.parse_args()
+
+    analyzer = VideoAnalyzer(output_dir=args.output, workers=args.workers, model_path=args.model,
+                             frame_step=args.frame_step, motion_gate=not args.no_motion_gate, force=args.force)
+    analyzer.process(args.paths)
@@ -0,0 +1,9 @@
+import config
+
+def create_db_manager():
+    # Storage backend selected by config.DB_BACKEND ('mysql' or 'sqlite')
+    if config.DB_BACKEND == 'sqlite':
+        from database.sqlite_manager import SQLiteDatabaseManager
+        return SQLiteDatabaseManager()
+    from database.db_manager import DatabaseManager
+    return DatabaseManager()
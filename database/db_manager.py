@@ -1,27 +1,36 @@
+import time
+import threading
+from contextlib import contextmanager
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
 import config
+from datetime import datetime
+from database.rollups import rollup_increments, stats_range, GRANULARITIES
 
 class DatabaseManager:
-    def __init__(self, host=config.DB_HOST, database=config.DB_NAME, user=config.DB_USER, password=config.DB_PASSWORD):
+    def __init__(self, host=config.DB_HOST, database=config.DB_NAME, user=config.DB_USER, password=config.DB_PASSWORD,
+                 pool_size=config.DB_POOL_SIZE):
         self.config = {
             'host': host,
             'database': database,
             'user': user,
             'password': password
         }
-        self.conn = None
+        # Connection pool: every call checks out its own connection, so the GUI thread
+        # (get_stats) and the log writer thread (log_posture) never share one.
+        self.pool_size = pool_size
+        self.pool = None
+        self.pool_lock = threading.Lock()
+        # Reconnect backoff while the server is unreachable
+        self.retry_delay = 1.0
+        self.next_retry = 0.0
+        self.connecting = False
         self.init_db()
 
-    def connect(self):
-        try:
-            self.conn = mysql.connector.connect(**self.config)
-            if self.conn.is_connected():
-                return self.conn
-        except Error as e:
-            # Handle case where database doesn't exist yet
-             pass
-        return None
+    @property
+    def conn(self):
+        # Kept for callers that check `if not db.conn`: truthy while the pool is up
+        return self.pool
 
     def create_database(self):
         try:
@@ -37,12 +46,12 @@ class DatabaseManager:
     def init_db(self):
         self.create_database()
         try:
-            self.conn = mysql.connector.connect(**self.config)
-            cursor = self.conn.cursor()
-            
+            conn = mysql.connector.connect(**self.config)
+            cursor = conn.cursor()
+
             # Read schema from file if running from project root
             # Or define here. Let's define simple creates here for robustness
-            
+
             cursor.execute("""
             CREATE TABLE IF NOT EXISTS users (
                 id INT AUTO_INCREMENT PRIMARY KEY,
@@ -50,68 +59,226 @@ class DatabaseManager:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
             """)
-            
+
             cursor.execute("""
             CREATE TABLE IF NOT EXISTS posture_logs (
                 id INT AUTO_INCREMENT PRIMARY KEY,
                 user_id INT,
-                posture_type VARCHAR(10),
+                posture_type VARCHAR(20),
                 duration_seconds FLOAT,
                 timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                INDEX idx_logs_user_time (user_id, timestamp),
                 FOREIGN KEY (user_id) REFERENCES users(id)
             )
             """)
-            
-            self.conn.commit()
+
+            # Tables created before the index existed
+            cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = 'posture_logs' AND index_name = 'idx_logs_user_time'
+            """)
+            if cursor.fetchone()[0] == 0:
+                cursor.execute("CREATE INDEX idx_logs_user_time ON posture_logs (user_id, timestamp)")
+
+            # Rollups read by get_stats (see rollups.py)
+            for table, bucket_type in (('posture_rollup_hourly', 'DATETIME'), ('posture_rollup_daily', 'DATE')):
+                cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    user_id INT NOT NULL,
+                    bucket {bucket_type} NOT NULL,
+                    posture_type VARCHAR(20) NOT NULL,
+                    total_duration DOUBLE NOT NULL DEFAULT 0,
+                    PRIMARY KEY (user_id, bucket, posture_type)
+                )
+                """)
+
+            conn.commit()
+
+            # Backfill rollups for logs written before they existed
+            cursor.execute("SELECT EXISTS(SELECT 1 FROM posture_rollup_daily), EXISTS(SELECT 1 FROM posture_logs)")
+            has_rollups, has_logs = cursor.fetchone()
+            if has_logs and not has_rollups:
+                self.rebuild_rollups(conn)
+            conn.close()
+
+            self.pool = pooling.MySQLConnectionPool(
+                pool_name=f"posture_{id(self)}", pool_size=self.pool_size, **self.config)
+            self.retry_delay = 1.0
         except Error as e:
             print(f"Error initializing tables: {e}")
-            self.conn = None
+            self.pool = None
+            # Try again later, backing off up to a minute between attempts
+            self.next_retry = time.time() + self.retry_delay
+            self.retry_delay = min(self.retry_delay * 2, 60.0)
 
-    def add_user(self, username):
-        if not self.conn:
-             return None
+    def get_pool(self):
+        # The pool, re-created (with backoff) if the server was unreachable so far.
+        # One thread reconnects, outside the lock; the others get None meanwhile
+        # instead of blocking on the connect timeout.
+        with self.pool_lock:
+            if self.pool is not None or self.connecting or time.time() < self.next_retry:
+                return self.pool
+            self.connecting = True
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("INSERT IGNORE INTO users (username) VALUES (%s)", (username,))
-            self.conn.commit()
-            
-            cursor.execute("SELECT id FROM users WHERE username = %s", (username,))
-            return cursor.fetchone()[0]
-        except Error as e:
-            print(f"Error adding user: {e}")
-            return None
+            self.init_db()
+        finally:
+            with self.pool_lock:
+                self.connecting = False
+        return self.pool
+
+    @contextmanager
+    def connection(self, timeout=5.0):
+        # Checks out a healthy pooled connection for the calling thread:
+        #   with db.connection() as conn: ...
+        # Yields None when the database is unavailable.
+        pool = self.get_pool()
+        conn = None
+        deadline = time.time() + timeout
+        while pool is not None:
+            try:
+                conn = pool.get_connection()
+                break
+            except pooling.PoolError:
+                # All connections checked out by other threads; wait for one
+                if time.time() >= deadline:
+                    print("Error getting database connection: pool exhausted")
+                    break
+                time.sleep(0.05)
+            except Error as e:
+                print(f"Error getting database connection: {e}")
+                break
+
+        if conn is not None:
+            try:
+                # Health check; transparently reconnects a dropped connection
+                conn.ping(reconnect=True, attempts=3, delay=1)
+            except Error as e:
+                print(f"Database connection lost: {e}")
+                conn.close()
+                conn = None
 
-    def log_posture(self, user_id, posture_type, duration):
-        if not self.conn:
-             return
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                "INSERT INTO posture_logs (user_id, posture_type, duration_seconds) VALUES (%s, %s, %s)",
-                (user_id, posture_type, duration)
-            )
-            self.conn.commit()
-        except Error as e:
-            print(f"Error logging posture: {e}")
+            yield conn
+        finally:
+            if conn is not None:
+                conn.close() # returns it to the pool
+
+    def add_user(self, username):
+        with self.connection() as conn:
+            if not conn:
+                 return None
+            try:
+                cursor = conn.cursor()
+                cursor.execute("INSERT IGNORE INTO users (username) VALUES (%s)", (username,))
+                conn.commit()
+
+                cursor.execute("SELECT id FROM users WHERE username = %s", (username,))
+                return cursor.fetchone()[0]
+            except Error as e:
+                print(f"Error adding user: {e}")
+                return None
 
-    def get_stats(self, user_id, days=7):
-        # Return stats for charts
-        if not self.conn:
-             return []
+    def ensure_user(self, user_id):
+        # Creates user `user_id` (named "user<id>") if it doesn't exist yet, for callers that
+        # log under a bare id; posture_logs.user_id references users. Returns True if it exists.
+        with self.connection() as conn:
+            if not conn:
+                 return False
+            try:
+                cursor = conn.cursor()
+                cursor.execute("INSERT IGNORE INTO users (id, username) VALUES (%s, %s)", (user_id, f"user{user_id}"))
+                conn.commit()
+
+                cursor.execute("SELECT 1 FROM users WHERE id = %s", (user_id,))
+                if cursor.fetchone():
+                    return True
+                print(f"Error adding user: cannot create user {user_id}")
+            except Error as e:
+                print(f"Error adding user: {e}")
+            return False
+
+    def log_posture(self, user_id, posture_type, duration, timestamp=None):
+        self.log_postures([(user_id, posture_type, duration, timestamp)])
+
+    def log_postures(self, rows):
+        # rows: [(user_id, posture_type, duration, timestamp or None)], written as one
+        # multi-row INSERT and a single commit (None timestamp = now)
+        if not rows:
+             return
+        now = datetime.now()
+        rows = [(user_id, posture_type, duration, timestamp or now)
+                for user_id, posture_type, duration, timestamp in rows]
+        with self.connection() as conn:
+            if not conn:
+                 return
+            try:
+                cursor = conn.cursor()
+                # executemany turns this into a single multi-row INSERT
+                cursor.executemany(
+                    "INSERT INTO posture_logs (user_id, posture_type, duration_seconds, timestamp) "
+                    "VALUES (%s, %s, %s, %s)",
+                    rows
+                )
+                # Same transaction: add the durations to the hourly / daily rollups
+                for granularity, increments in rollup_increments(rows).items():
+                    cursor.executemany(
+                        f"INSERT INTO {GRANULARITIES[granularity]} (user_id, bucket, posture_type, total_duration) "
+                        "VALUES (%s, %s, %s, %s) "
+                        "ON DUPLICATE KEY UPDATE total_duration = total_duration + VALUES(total_duration)",
+                        increments
+                    )
+                conn.commit()
+            except Error as e:
+                print(f"Error logging posture: {e}")
+
+    def get_stats(self, user_id, days=7, granularity='day', start=None, end=None):
+        # Return stats for charts: [{'date': bucket, 'posture_type', 'total_duration'}]
+        # Read from the rollups: granularity 'day' (date buckets) or 'hour' (datetime
+        # buckets), over the last `days` days or [start, end).
+        table, start, end = stats_range(days, start, end, granularity)
+        query = f"""
+        SELECT bucket as date, posture_type, total_duration
+        FROM {table}
+        WHERE user_id = %s AND bucket >= %s AND bucket < %s
+        ORDER BY bucket
+        """
+        return self.fetch_all(query, (user_id, start, end))
+
+    def rebuild_rollups(self, conn=None):
+        # Compaction / repair job: recomputes both rollup tables from posture_logs
+        if conn is None:
+            with self.connection() as conn:
+                if conn:
+                    self.rebuild_rollups(conn)
+            return
         try:
-            cursor = self.conn.cursor(dictionary=True)
-            # Simple daily aggregation
-            query = """
-            SELECT DATE(timestamp) as date, posture_type, SUM(duration_seconds) as total_duration 
-            FROM posture_logs 
-            WHERE user_id = %s AND timestamp >= NOW() - INTERVAL %s DAY
-            GROUP BY date, posture_type
-            """
-            cursor.execute(query, (user_id, days))
-            return cursor.fetchall()
+            cursor = conn.cursor()
+            for table, bucket in (('posture_rollup_hourly', "DATE_FORMAT(timestamp, '%Y-%m-%d %H:00:00')"),
+                                  ('posture_rollup_daily', "DATE(timestamp)")):
+                cursor.execute(f"DELETE FROM {table}")
+                cursor.execute(f"""
+                INSERT INTO {table} (user_id, bucket, posture_type, total_duration)
+                SELECT user_id, {bucket}, posture_type, SUM(duration_seconds)
+                FROM posture_logs
+                WHERE user_id IS NOT NULL AND posture_type IS NOT NULL
+                GROUP BY user_id, {bucket}, posture_type
+                """)
+            conn.commit()
         except Error as e:
-            print(f"Error getting stats: {e}")
-            return []
+            print(f"Error rebuilding rollups: {e}")
+
+    def fetch_all(self, query, params=()):
+        # Rows as dicts; [] on error or when the database is unavailable
+        with self.connection() as conn:
+            if not conn:
+                 return []
+            try:
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute(query, params)
+                return cursor.fetchall()
+            except Error as e:
+                print(f"Error querying database: {e}")
+                return []
 
 if __name__ == "__main__":
     # Test
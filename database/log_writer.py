@@ -0,0 +1,79 @@
+import queue
+import threading
+import time
+from datetime import datetime
+
+class AsyncPostureLogger:
+    # Background writer in front of a DatabaseManager.
+    # log_posture() only enqueues (never blocks the video thread); a worker thread
+    # writes the events as multi-row INSERTs when batch_size events are waiting or
+    # flush_interval seconds have passed. close() flushes whatever is left.
+    def __init__(self, db, batch_size=50, flush_interval=5.0, max_queue=10000):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.closed = False
+        # Bumped after every write; readers (e.g. the report cache) compare it to
+        # tell whether the stored stats changed since they last looked
+        self.version = 0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def log_posture(self, user_id, posture_type, duration, timestamp=None):
+        # Same signature as DatabaseManager.log_posture; the event time is taken now,
+        # so a delayed flush doesn't shift it
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait((user_id, posture_type, duration, timestamp or datetime.now()))
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1:
+                print("Posture log queue full (database too slow?), dropping events.")
+
+    def run(self):
+        batch = []
+        deadline = time.time() + self.flush_interval
+        while True:
+            try:
+                item = self.queue.get(timeout=max(0.0, deadline - time.time()))
+            except queue.Empty:
+                item = False # timed out
+
+            if item is None: # close() marker
+                break
+            if item:
+                batch.append(item)
+
+            if len(batch) >= self.batch_size or time.time() >= deadline:
+                self.flush(batch)
+                batch = []
+                deadline = time.time() + self.flush_interval
+
+        # Shutdown: write everything still queued
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item:
+                batch.append(item)
+        self.flush(batch)
+
+    def flush(self, batch):
+        if not batch:
+            return
+        try:
+            self.db.log_postures(batch)
+        except Exception as e:
+            print(f"Error writing posture logs: {e}")
+        self.version += 1
+
+    def close(self, timeout=10):
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(None) # blocks only if the queue is full, until the worker drains it
+        self.thread.join(timeout)
@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+
+# Pre-aggregated posture durations, maintained on every insert into posture_logs:
+#   posture_rollup_hourly (user_id, bucket = start of the hour, posture_type, total_duration)
+#   posture_rollup_daily  (user_id, bucket = date,              posture_type, total_duration)
+# A log row counts towards the bucket of its timestamp, exactly like grouping the raw
+# table by DATE(timestamp), so reports read a few rows per day whatever the log size.
+GRANULARITIES = {
+    'hour': 'posture_rollup_hourly',
+    'day': 'posture_rollup_daily',
+}
+
+def hour_bucket(timestamp):
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+def rollup_increments(rows):
+    # rows: [(user_id, posture_type, duration, timestamp)] ->
+    # {'hour': [(user_id, bucket, posture_type, duration)], 'day': [...]}, summed per key
+    sums = {'hour': {}, 'day': {}}
+    for user_id, posture_type, duration, timestamp in rows:
+        for granularity, bucket in (('hour', hour_bucket(timestamp)), ('day', timestamp.date())):
+            key = (user_id, bucket, posture_type)
+            sums[granularity][key] = sums[granularity].get(key, 0.0) + (duration or 0.0)
+    return {g: [key + (total,) for key, total in s.items()] for g, s in sums.items()}
+
+def stats_range(days=7, start=None, end=None, granularity='day'):
+    # Resolves get_stats arguments into (table, first bucket, end) - end is exclusive
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity '{granularity}', use one of {list(GRANULARITIES)}")
+    end = end or datetime.now() + timedelta(days=1)
+    start = start or datetime.now() - timedelta(days=days)
+    if granularity == 'day':
+        start = start.date() if isinstance(start, datetime) else start
+        end = end.date() if isinstance(end, datetime) else end
+    else:
+        start = hour_bucket(start) if isinstance(start, datetime) else datetime.combine(start, datetime.min.time())
+        end = end if isinstance(end, datetime) else datetime.combine(end, datetime.min.time())
+    return GRANULARITIES[granularity], start, end
@@ -7,8 +7,26 @@ CREATE TABLE IF NOT EXISTS users (
 CREATE TABLE IF NOT EXISTS posture_logs (
     id INT AUTO_INCREMENT PRIMARY KEY,
     user_id INT,
-    posture_type VARCHAR(10), -- 'good' or 'bad'
-    duration_seconds INT,
+    posture_type VARCHAR(20), -- posture label, e.g. 'Good', 'Slouching'
+    duration_seconds FLOAT,
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_logs_user_time (user_id, timestamp),
     FOREIGN KEY (user_id) REFERENCES users(id)
 );
+
+-- Pre-aggregated durations, updated together with every posture_logs insert
+CREATE TABLE IF NOT EXISTS posture_rollup_hourly (
+    user_id INT NOT NULL,
+    bucket DATETIME NOT NULL, -- start of the hour
+    posture_type VARCHAR(20) NOT NULL,
+    total_duration DOUBLE NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, bucket, posture_type)
+);
+
+CREATE TABLE IF NOT EXISTS posture_rollup_daily (
+    user_id INT NOT NULL,
+    bucket DATE NOT NULL,
+    posture_type VARCHAR(20) NOT NULL,
+    total_duration DOUBLE NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, bucket, posture_type)
+);
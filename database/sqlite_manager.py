@@ -0,0 +1,210 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, date
+import config
+from database.rollups import rollup_increments, stats_range, GRANULARITIES
+
+class SQLiteDatabaseManager:
+    # In-process storage backend with the same interface as DatabaseManager
+    # (add_user / log_posture / log_postures / get_stats / fetch_all / connection).
+    # One connection per thread, WAL journal so the GUI can read while the log writer writes.
+    def __init__(self, path=config.SQLITE_PATH):
+        self.path = path
+        self.local = threading.local()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.init_db()
+
+    @property
+    def conn(self):
+        # Same truthiness check as DatabaseManager.conn
+        return self.get_conn()
+
+    def get_conn(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            try:
+                conn = sqlite3.connect(self.path, timeout=5.0)
+                conn.row_factory = sqlite3.Row
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL") # safe with WAL, far fewer fsyncs
+                conn.execute("PRAGMA foreign_keys=ON")
+            except sqlite3.Error as e:
+                print(f"Error opening database {self.path}: {e}")
+                return None
+            self.local.conn = conn
+        return conn
+
+    @contextmanager
+    def connection(self):
+        yield self.get_conn()
+
+    def init_db(self):
+        conn = self.get_conn()
+        if not conn:
+            return
+        try:
+            conn.executescript("""
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username VARCHAR(50) NOT NULL UNIQUE,
+                created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+            );
+
+            CREATE TABLE IF NOT EXISTS posture_logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INT,
+                posture_type VARCHAR(20),
+                duration_seconds FLOAT,
+                timestamp TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+                FOREIGN KEY (user_id) REFERENCES users(id)
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_logs_user_time ON posture_logs (user_id, timestamp);
+
+            CREATE TABLE IF NOT EXISTS posture_rollup_hourly (
+                user_id INT NOT NULL,
+                bucket TIMESTAMP NOT NULL,
+                posture_type VARCHAR(20) NOT NULL,
+                total_duration DOUBLE NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, bucket, posture_type)
+            );
+
+            CREATE TABLE IF NOT EXISTS posture_rollup_daily (
+                user_id INT NOT NULL,
+                bucket DATE NOT NULL,
+                posture_type VARCHAR(20) NOT NULL,
+                total_duration DOUBLE NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, bucket, posture_type)
+            );
+            """)
+            conn.commit()
+
+            # Backfill rollups for logs written before they existed
+            has_rollups, has_logs = conn.execute(
+                "SELECT EXISTS(SELECT 1 FROM posture_rollup_daily), EXISTS(SELECT 1 FROM posture_logs)").fetchone()
+            if has_logs and not has_rollups:
+                self.rebuild_rollups()
+        except sqlite3.Error as e:
+            print(f"Error initializing tables: {e}")
+
+    def add_user(self, username):
+        conn = self.get_conn()
+        if not conn:
+             return None
+        try:
+            conn.execute("INSERT OR IGNORE INTO users (username) VALUES (?)", (username,))
+            conn.commit()
+            row = conn.execute("SELECT id FROM users WHERE username = ?", (username,)).fetchone()
+            return row[0]
+        except sqlite3.Error as e:
+            print(f"Error adding user: {e}")
+            return None
+
+    def ensure_user(self, user_id):
+        # Creates user `user_id` (named "user<id>") if it doesn't exist yet, for callers that
+        # log under a bare id; posture_logs.user_id references users. Returns True if it exists.
+        conn = self.get_conn()
+        if not conn:
+             return False
+        try:
+            conn.execute("INSERT OR IGNORE INTO users (id, username) VALUES (?, ?)", (user_id, f"user{user_id}"))
+            conn.commit()
+            if conn.execute("SELECT 1 FROM users WHERE id = ?", (user_id,)).fetchone():
+                return True
+            print(f"Error adding user: cannot create user {user_id}")
+        except sqlite3.Error as e:
+            print(f"Error adding user: {e}")
+        return False
+
+    def log_posture(self, user_id, posture_type, duration, timestamp=None):
+        self.log_postures([(user_id, posture_type, duration, timestamp)])
+
+    def log_postures(self, rows):
+        # rows: [(user_id, posture_type, duration, timestamp or None)], one transaction
+        conn = self.get_conn()
+        if not conn or not rows:
+             return
+        now = datetime.now()
+        rows = [(user_id, posture_type, duration, timestamp or now)
+                for user_id, posture_type, duration, timestamp in rows]
+        try:
+            conn.executemany(
+                "INSERT INTO posture_logs (user_id, posture_type, duration_seconds, timestamp) "
+                "VALUES (?, ?, ?, ?)",
+                [row[:3] + (self.to_db_time(row[3]),) for row in rows]
+            )
+            # Same transaction: add the durations to the hourly / daily rollups
+            for granularity, increments in rollup_increments(rows).items():
+                conn.executemany(
+                    f"INSERT INTO {GRANULARITIES[granularity]} (user_id, bucket, posture_type, total_duration) "
+                    "VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (user_id, bucket, posture_type) "
+                    "DO UPDATE SET total_duration = total_duration + excluded.total_duration",
+                    [(u, self.to_db_time(b), p, d) for u, b, p, d in increments]
+                )
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error logging posture: {e}")
+            # Drop the rows inserted before the failure with their rollups, and release the write lock
+            conn.rollback()
+
+    def get_stats(self, user_id, days=7, granularity='day', start=None, end=None):
+        # Same rows and arguments as DatabaseManager.get_stats, read from the rollups
+        table, start, end = stats_range(days, start, end, granularity)
+        rows = self.fetch_all(f"""
+            SELECT bucket as date, posture_type, total_duration
+            FROM {table}
+            WHERE user_id = ? AND bucket >= ? AND bucket < ?
+            ORDER BY bucket
+            """, (user_id, self.to_db_time(start), self.to_db_time(end)))
+        parse = date.fromisoformat if granularity == 'day' else datetime.fromisoformat
+        for row in rows:
+            row['date'] = parse(row['date'])
+        return rows
+
+    def rebuild_rollups(self):
+        # Compaction / repair job: recomputes both rollup tables from posture_logs
+        conn = self.get_conn()
+        if not conn:
+            return
+        try:
+            for table, bucket in (('posture_rollup_hourly', "strftime('%Y-%m-%d %H:00:00', timestamp)"),
+                                  ('posture_rollup_daily', "DATE(timestamp)")):
+                conn.execute(f"DELETE FROM {table}")
+                conn.execute(f"""
+                INSERT INTO {table} (user_id, bucket, posture_type, total_duration)
+                SELECT user_id, {bucket} AS b, posture_type, SUM(duration_seconds)
+                FROM posture_logs
+                WHERE user_id IS NOT NULL AND posture_type IS NOT NULL
+                GROUP BY user_id, b, posture_type
+                """)
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error rebuilding rollups: {e}")
+
+    def fetch_all(self, query, params=()):
+        # Rows as dicts, like a MySQL dictionary cursor
+        conn = self.get_conn()
+        if not conn:
+            return []
+        try:
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+        except sqlite3.Error as e:
+            print(f"Error querying database: {e}")
+            return []
+
+    def to_db_time(self, timestamp):
+        # Stored as local time text, the same format datetime('now', 'localtime') writes
+        # (dates as YYYY-MM-DD), so text comparison orders like time
+        if isinstance(timestamp, datetime):
+            return timestamp.strftime("%Y-%m-%d %H:%M:%S")
+        return timestamp.isoformat()
+
+    def close(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
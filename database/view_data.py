@@ -4,24 +4,24 @@ import os
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from database.db_manager import DatabaseManager
+from database import create_db_manager
 import config
 
 def view_data():
-    print(f"Connecting to MySQL Database '{config.DB_NAME}' at {config.DB_HOST}...")
-    db = DatabaseManager()
+    if config.DB_BACKEND == 'sqlite':
+        print(f"Opening SQLite Database '{config.SQLITE_PATH}'...")
+    else:
+        print(f"Connecting to MySQL Database '{config.DB_NAME}' at {config.DB_HOST}...")
+    db = create_db_manager()
     
     if not db.conn:
         print("Failed to connect to database.")
         return
 
-    cursor = db.conn.cursor(dictionary=True)
-
     # 1. View Users
     print("\n=== Table: users ===")
     try:
-        cursor.execute("SELECT * FROM users")
-        users = cursor.fetchall()
+        users = db.fetch_all("SELECT * FROM users")
         if not users:
             print("(No users found)")
         else:
@@ -35,14 +35,13 @@ def view_data():
     # 2. View Logs (Last 10)
     print("\n=== Table: posture_logs (Last 10 Reocrds) ===")
     try:
-        cursor.execute("""
+        logs = db.fetch_all("""
             SELECT l.id, u.username, l.posture_type, l.duration_seconds, l.timestamp 
             FROM posture_logs l
             JOIN users u ON l.user_id = u.id
             ORDER BY l.timestamp DESC 
             LIMIT 10
         """)
-        logs = cursor.fetchall()
         if not logs:
             print("(No logs found)")
         else:
@@ -0,0 +1,64 @@
+import threading
+import cv2
+import numpy as np
+from PyQt5.QtGui import QImage
+
+# Qt >= 5.14 can wrap BGR data directly; older builds need one conversion into RGB
+HAS_BGR888 = hasattr(QImage, 'Format_BGR888')
+
+class DisplayBufferRing:
+    # Turns annotated frames into display-sized QImages without per-frame allocations.
+    # The frame is downsized first (into a preallocated buffer), so any remaining pixel
+    # work runs at display resolution, and the QImage wraps that buffer without copying.
+    #
+    # A QImage built on a numpy buffer does not own its pixels, so a buffer must not be
+    # rewritten while the GUI thread may still read it. The ring has `slots` buffers
+    # and a slot is only reused after the GUI has called release() for it (after its
+    # QPixmap copy). When every slot is still in flight the frame is skipped: the GUI
+    # is behind anyway and queuing more frames would only add latency.
+    def __init__(self, size=(640, 480), slots=3):
+        self.size = size
+        self.slots = slots
+        self.buffers = [None] * slots
+        self.rgb_buffers = [None] * slots
+        self.next_slot = 0
+        self.free = threading.Semaphore(slots)
+        self.skipped = 0
+
+    def fit(self, frame):
+        # Display size keeping the aspect ratio (like QImage.scaled(..., KeepAspectRatio))
+        h, w = frame.shape[:2]
+        scale = min(self.size[0] / w, self.size[1] / h)
+        return max(1, int(w * scale)), max(1, int(h * scale))
+
+    def to_qimage(self, frame, draw=None):
+        # Returns (QImage, slot) or (None, None) if no slot is free. The caller must
+        # pass slot to release() once the image has been copied / displayed.
+        # draw(img): optional annotation callback, run on the display-sized BGR image.
+        if not self.free.acquire(blocking=False):
+            self.skipped += 1
+            return None, None
+        slot = self.next_slot
+        self.next_slot = (slot + 1) % self.slots
+
+        w, h = self.fit(frame)
+        buf = self.buffers[slot]
+        if buf is None or buf.shape[:2] != (h, w):
+            buf = self.buffers[slot] = np.empty((h, w, 3), dtype=np.uint8)
+        cv2.resize(frame, (w, h), dst=buf, interpolation=cv2.INTER_AREA)
+        if draw:
+            draw(buf)
+
+        if HAS_BGR888:
+            return QImage(buf.data, w, h, buf.strides[0], QImage.Format_BGR888), slot
+
+        rgb = self.rgb_buffers[slot]
+        if rgb is None or rgb.shape != buf.shape:
+            rgb = self.rgb_buffers[slot] = np.empty_like(buf)
+        cv2.cvtColor(buf, cv2.COLOR_BGR2RGB, dst=rgb)
+        return QImage(rgb.data, w, h, rgb.strides[0], QImage.Format_RGB888), slot
+
+    def release(self, slot):
+        # Slots are handed out round-robin and queued signals are delivered in order,
+        # so releases come back in the same order; only the count needs tracking
+        self.free.release()
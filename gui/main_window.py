@@ -1,49 +1,69 @@
 import sys
 import cv2
 import time
+import threading
+from functools import partial
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QLabel, QPushButton, QTabWidget, QMessageBox)
-from PyQt5.QtCore import QThread, pyqtSignal, Qt, QTimer
+from PyQt5.QtCore import QThread, pyqtSignal, QTimer, QEvent
 from PyQt5.QtGui import QImage, QPixmap
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 
 # Project Imports
-from core.processor import HealthProcessor
-from database.db_manager import DatabaseManager
+# (HealthProcessor, the database and matplotlib are imported lazily, see BackendLoader
+# and init_report_chart, so the window can be shown before they are loaded)
+from core import startup
+from core.pipeline import FrameGrabber, LatestFrameSlot
+from gui.reports import ReportCache, ReportChart
+from gui.frame_display import DisplayBufferRing
 import config
 
 class VideoThread(QThread):
-    change_pixmap_signal = pyqtSignal(QImage)
+    change_pixmap_signal = pyqtSignal(QImage, object) # image, release callback for its buffer
     update_status_signal = pyqtSignal(str, str) # Label, Confidence
 
-    def __init__(self, processor):
+    def __init__(self, processor, pipelined=config.VIDEO_PIPELINED):
         super().__init__()
         self.processor = processor
         self.running = True
+        # pipelined: capture / inference / render run as separate stages (see run_pipelined)
+        self.pipelined = pipelined
+        # Display-sized frame buffers shared with the GUI thread (see frame_display.py)
+        self.display = DisplayBufferRing((640, 480))
+        # False while the video isn't visible: frames are processed but not displayed
+        self.preview_visible = True
 
     update_stats_signal = pyqtSignal(str) # FPS/Latency
 
     def run(self):
+        if self.pipelined:
+            self.run_pipelined()
+        else:
+            self.run_serial()
+
+    def emit_frame(self, frame, overlay=None):
+        # Resize first into a reusable buffer, draw the processor overlay onto it at
+        # display resolution, then wrap it as a QImage without copying.
+        # The GUI calls the release callback once it has copied the image into a pixmap.
+        if not self.preview_visible:
+            return
+        qt_img, slot = self.display.to_qimage(frame, partial(self.processor.draw_overlay, overlay=overlay))
+        if qt_img is not None:
+            self.change_pixmap_signal.emit(qt_img, partial(self.display.release, slot))
+
+    def run_serial(self):
         cap = cv2.VideoCapture(config.CAMERA_ID)
         while self.running:
             start_time = time.time()
             ret, frame = cap.read()
             if ret:
-                self.last_frame = frame.copy() # Store for capture
+                self.last_frame = frame # Store for capture (the overlay is drawn on a display copy)
                 # Process Frame (Detect + Predict)
                 frame, label, conf = self.processor.process_frame(frame)
                 
                 # Emit Status
                 self.update_status_signal.emit(label, f"{conf:.2f}")
 
-                # Convert to Qt Image
-                rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                h, w, ch = rgb_image.shape
-                bytes_per_line = ch * w
-                convert_to_Qt_format = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format_RGB888)
-                p = convert_to_Qt_format.scaled(640, 480, Qt.KeepAspectRatio)
-                self.change_pixmap_signal.emit(p)
+                self.emit_frame(frame, self.processor.overlay)
             
             # Subtracted sleep to measure pure processing latency involves more complex logic, 
             # but for "System Latency", end-to-end time is what matters.
@@ -51,7 +71,7 @@ class VideoThread(QThread):
             latency_ms = process_time * 1000
             fps = 1.0 / process_time if process_time > 0 else 0
             
-            self.update_stats_signal.emit(f"FPS: {fps:.1f} | Latency: {latency_ms:.1f}ms")
+            self.update_stats_signal.emit(f"FPS: {fps:.1f} | Latency: {latency_ms:.1f}ms | {self.processor.stats_text()}")
             
             # Adjust sleep to maintain cap but not double sleep
             # simple sleep for stability
@@ -60,25 +80,125 @@ class VideoThread(QThread):
 
         cap.release()
 
+    def run_pipelined(self):
+        # Capture thread -> [latest frame slot] -> inference (this thread)
+        #   -> [latest result slot] -> render thread -> GUI.
+        # Each slot keeps only the newest item, so the displayed posture always comes
+        # from the freshest frame and throughput is bound by the slowest stage.
+        cap = cv2.VideoCapture(config.CAMERA_ID)
+        grabber = FrameGrabber(cap)
+        render_slot = LatestFrameSlot()
+        renderer = threading.Thread(target=self.render_loop, args=(render_slot,), daemon=True)
+        grabber.start()
+        renderer.start()
+
+        seq = 0
+        last_done = time.time()
+        while self.running:
+            seq, item = grabber.slot.get(seq, timeout=0.5)
+            if item is None:
+                continue
+            frame, captured_at = item
+            self.last_frame = frame # Store for capture (the overlay is drawn on a display copy)
+
+            # Process Frame (Detect + Predict)
+            frame, label, conf = self.processor.process_frame(frame)
+            self.update_status_signal.emit(label, f"{conf:.2f}")
+            if self.preview_visible:
+                render_slot.put((frame, self.processor.overlay))
+
+            # FPS = inference throughput, Latency = capture -> result
+            now = time.time()
+            fps = 1.0 / (now - last_done) if now > last_done else 0
+            latency_ms = (now - captured_at) * 1000
+            last_done = now
+            self.update_stats_signal.emit(
+                f"FPS: {fps:.1f} | Latency: {latency_ms:.1f}ms | Dropped: {grabber.slot.dropped} | "
+                f"{self.processor.stats_text()}")
+
+        grabber.stop()
+        render_slot.close()
+        renderer.join()
+        cap.release()
+
+    def render_loop(self, render_slot):
+        seq = 0
+        while True:
+            seq, item = render_slot.get(seq)
+            if item is None:
+                return # closed
+            self.emit_frame(*item)
+
     def stop(self):
         self.running = False
         self.wait()
 
+class BackendLoader(QThread):
+    # Loads the slow parts of the backend off the GUI thread, so the window shows at once:
+    # the database (connect, create tables, default user) and the HealthProcessor
+    # (MediaPipe graph + unpickled model), both at the same time.
+    loaded = pyqtSignal(object) # (db, user_id, log_writer, processor)
+    failed = pyqtSignal(str)
+
+    def run(self):
+        self.backend = {}
+        self.errors = []
+        db_thread = threading.Thread(target=self.load_database, name="DBLoader", daemon=True)
+        db_thread.start()
+        self.load_processor()
+        db_thread.join()
+        if self.errors:
+            self.failed.emit(self.errors[0])
+            return
+        b = self.backend
+        # The processor was built before the database was ready; connect them now
+        b['processor'].db = b['log_writer']
+        b['processor'].user_id = b['user_id']
+        self.loaded.emit((b['db'], b['user_id'], b['log_writer'], b['processor']))
+
+        # Still on this thread, after the window is live: load the other model complexity
+        # tiers now (MediaPipe downloads them on first use) rather than on the video
+        # thread mid-session. Only builds throwaway graphs; the processor's is untouched.
+        if b['processor'].complexity:
+            b['processor'].complexity.check_tiers()
+
+    def load_database(self):
+        try:
+            with startup.timed("database init"):
+                from database import create_db_manager
+                from database.log_writer import AsyncPostureLogger
+                db = create_db_manager() # Backend and settings from config
+                # Ensure default user exists
+                user_id = db.add_user("admin")
+                if not user_id:
+                    user_id = 1 # Fallback, though logging might fail if DB connection is broken
+                # Posture events are written by a background thread, never on the video thread
+                self.backend.update(db=db, user_id=user_id, log_writer=AsyncPostureLogger(db))
+        except Exception as e:
+            self.errors.append(f"Database: {e}")
+
+    def load_processor(self):
+        try:
+            with startup.timed("pose graph + posture model"):
+                from core.processor import HealthProcessor
+                # Overlay is drawn lazily on the downsized display frame, and not at all while hidden
+                self.backend['processor'] = HealthProcessor(render='lazy')
+        except Exception as e:
+            self.errors.append(f"Processor: {e}")
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Office Health Reminder System")
         self.resize(1000, 700)
 
-        # Initialize Backend
-        self.db = DatabaseManager() # Uses config defaults
-        
-        # Ensure default user exists
-        current_user_id = self.db.add_user("admin")
-        if not current_user_id:
-            current_user_id = 1 # Fallback, though logging might fail if DB connection is broken
-            
-        self.processor = HealthProcessor(db_manager=self.db, user_id=current_user_id)
+        # Backend: filled in by BackendLoader (on_backend_loaded)
+        self.db = None
+        self.current_user_id = None
+        self.log_writer = None
+        self.processor = None
+        self.report_cache = None
+        self.first_frame_shown = False
 
         # UI Setup
         self.central_widget = QWidget()
@@ -95,6 +215,27 @@ class MainWindow(QMainWindow):
 
         self.setup_monitor_tab()
         self.setup_report_tab()
+        self.tabs.currentChanged.connect(self.on_tab_changed)
+
+        self.btn_start.setEnabled(False)
+        self.status_label.setText("Status: Loading...")
+        self.loader = BackendLoader()
+        self.loader.loaded.connect(self.on_backend_loaded)
+        self.loader.failed.connect(self.on_backend_failed)
+        self.loader.start()
+
+    def on_backend_loaded(self, backend):
+        self.db, self.current_user_id, self.log_writer, self.processor = backend
+        startup.mark("backend ready")
+        print(startup.report())
+        self.status_label.setText("Status: Unknown")
+        self.btn_start.setEnabled(True)
+        self.update_preview_visibility()
+        self.plot_charts()
+
+    def on_backend_failed(self, error):
+        self.status_label.setText("Status: Error")
+        QMessageBox.critical(self, "Error", f"Failed to initialize: {error}")
 
     def setup_monitor_tab(self):
         layout = QHBoxLayout(self.monitor_tab)
@@ -187,6 +328,8 @@ class MainWindow(QMainWindow):
         QMessageBox.information(self, "Info", "Please run 'python data_pipeline/feature_extractor.py' and 'python data_pipeline/train_model.py' in terminal to update the model.")
 
     def open_settings(self):
+        if self.processor is None:
+            return # still loading
         from gui.settings_dialog import SettingsDialog
         dialog = SettingsDialog(self)
         if dialog.exec_():
@@ -201,15 +344,31 @@ class MainWindow(QMainWindow):
         layout = QVBoxLayout(self.report_tab)
         
         self.btn_refresh = QPushButton("Refresh Data")
-        self.btn_refresh.clicked.connect(self.plot_charts)
+        self.btn_refresh.clicked.connect(lambda: self.plot_charts(force=True))
         layout.addWidget(self.btn_refresh)
+        # The chart itself (and matplotlib) is created when the tab is first opened
+        self.report_layout = layout
+
+    def init_report_chart(self):
+        with startup.timed("import matplotlib"):
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 
-        self.figure = plt.figure()
+        self.figure = Figure()
         self.canvas = FigureCanvas(self.figure)
-        layout.addWidget(self.canvas)
+        self.report_layout.addWidget(self.canvas)
+
+        # Stats are fetched on a worker thread and cached until new logs are written
+        self.report_chart = ReportChart(self.figure, self.canvas)
+        self.report_cache = ReportCache(self.db, self.log_writer, self.current_user_id, self.report_chart.update)
+        # While the tab is open, pick up newly flushed logs
+        self.report_timer = QTimer(self)
+        self.report_timer.timeout.connect(self.plot_charts)
+        self.report_timer.start(5000)
 
     def start_video(self):
         self.thread = VideoThread(self.processor)
+        self.thread.preview_visible = self.processor.render != 'off'
         self.thread.change_pixmap_signal.connect(self.update_image)
         self.thread.update_status_signal.connect(self.update_status)
         self.thread.update_stats_signal.connect(self.update_stats)
@@ -220,12 +379,19 @@ class MainWindow(QMainWindow):
     def stop_video(self):
         if hasattr(self, 'thread'):
             self.thread.stop()
-        self.btn_start.setEnabled(True)
+            self.processor.end_session() # log the open timeline segment
+        self.btn_start.setEnabled(self.processor is not None)
         self.btn_stop.setEnabled(False)
         self.video_label.clear()
 
-    def update_image(self, qt_img):
+    def update_image(self, qt_img, release):
+        # fromImage copies the pixels, after which the thread may reuse the buffer
         self.video_label.setPixmap(QPixmap.fromImage(qt_img))
+        release()
+        if not self.first_frame_shown:
+            self.first_frame_shown = True
+            startup.mark("first frame displayed")
+            print(startup.report())
 
     def update_status(self, label, conf):
         color = "green" if label == "Good" else "red"
@@ -235,38 +401,42 @@ class MainWindow(QMainWindow):
     def update_stats(self, stats_text):
         self.fps_label.setText(stats_text)
 
-    def plot_charts(self):
-        self.figure.clear()
-        
-        # Dummy data if DB empty
-        data = self.db.get_stats(user_id=1, days=7)
-        if not data:
-            ax = self.figure.add_subplot(111)
-            ax.text(0.5, 0.5, "No Data Available", ha='center')
-        else:
-            # Process data for chart
-            # date, posture_type, duration
-            # We want stacked bar chart of Good vs Bad duration per day
-            dates = sorted(list(set(d['date'] for d in data)))
-            good_durations = []
-            bad_durations = []
-            
-            for date in dates:
-                g = next((d['total_duration'] for d in data if d['date'] == date and d['posture_type'] == 'good'), 0)
-                b = next((d['total_duration'] for d in data if d['date'] == date and d['posture_type'] == 'bad'), 0)
-                good_durations.append(g / 60) # mins
-                bad_durations.append(b / 60)
-
-            ax = self.figure.add_subplot(111)
-            labels = [str(d) for d in dates]
-            
-            ax.bar(labels, good_durations, label='Good Posture')
-            ax.bar(labels, bad_durations, bottom=good_durations, label='Bad Posture')
-            ax.set_ylabel('Duration (Minutes)')
-            ax.legend()
-            
-        self.canvas.draw()
+    def on_tab_changed(self, index):
+        self.update_preview_visibility()
+        if self.tabs.widget(index) is self.report_tab:
+            self.plot_charts()
+
+    def update_preview_visibility(self):
+        # Skip all drawing and display work while the video can't be seen
+        if self.processor is None:
+            return # still loading
+        visible = self.tabs.currentWidget() is self.monitor_tab and not self.isMinimized()
+        self.processor.set_render('lazy' if visible else 'off')
+        if hasattr(self, 'thread'):
+            self.thread.preview_visible = visible
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.WindowStateChange:
+            self.update_preview_visibility()
+        super().changeEvent(event)
+
+    def plot_charts(self, force=False):
+        # Non-blocking: redraws from the cache, or starts a background fetch if new
+        # posture logs arrived since the last one
+        if self.tabs.currentWidget() is not self.report_tab or self.log_writer is None:
+            return # not visible, or the database is still loading
+        if self.report_cache is None:
+            self.init_report_chart()
+        self.report_cache.refresh(force)
 
     def closeEvent(self, event):
         self.stop_video()
+        self.loader.wait()
+        if self.log_writer is None and self.loader.backend.get('log_writer'):
+            self.log_writer = self.loader.backend['log_writer'] # closed before on_backend_loaded ran
+        if self.log_writer:
+            self.log_writer.close() # flush pending posture logs
+        if self.report_cache:
+            self.report_timer.stop()
+            self.report_cache.close()
         event.accept()
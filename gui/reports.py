@@ -0,0 +1,112 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from core.timeline import is_good_label, is_bad_label
+
+def summarize_stats(rows):
+    # get_stats rows -> {date: [good_seconds, bad_seconds]} in one pass over the rows
+    per_date = {}
+    for row in rows:
+        totals = per_date.setdefault(row['date'], [0.0, 0.0])
+        if is_good_label(row['posture_type']):
+            totals[0] += row['total_duration'] or 0.0
+        elif is_bad_label(row['posture_type']):
+            totals[1] += row['total_duration'] or 0.0
+    return per_date
+
+class ReportWorker(QThread):
+    # Runs the stats query off the GUI thread; emits the per-date summary when done
+    data_ready = pyqtSignal(object, int) # {date: [good, bad]}, log version it reflects
+
+    def __init__(self, db, user_id, days, version):
+        super().__init__()
+        self.db = db
+        self.user_id = user_id
+        self.days = days
+        self.version = version
+
+    def run(self):
+        try:
+            rows = self.db.get_stats(user_id=self.user_id, days=self.days)
+        except Exception as e:
+            print(f"Error loading report data: {e}")
+            rows = []
+        self.data_ready.emit(summarize_stats(rows), self.version)
+
+class ReportCache:
+    # Report data for the Reports tab. The last summary is kept until the log writer
+    # reports new rows (its version counter moves), so re-opening the tab or pressing
+    # refresh without new logs costs nothing. Fetches only ever run on a ReportWorker;
+    # on_data is called on the GUI thread with the summary.
+    def __init__(self, db, log_writer, user_id, on_data, days=7):
+        self.db = db
+        self.log_writer = log_writer
+        self.user_id = user_id
+        self.on_data = on_data
+        self.days = days
+        self.data = None
+        self.version = -1
+        self.worker = None
+
+    def is_stale(self):
+        return self.data is None or self.version != self.log_writer.version
+
+    def refresh(self, force=False):
+        if not (force or self.is_stale()):
+            return # the chart already shows this data
+        if self.worker and self.worker.isRunning():
+            return # a fetch is already on its way; the next refresh picks up anything newer
+        self.worker = ReportWorker(self.db, self.user_id, self.days, self.log_writer.version)
+        self.worker.data_ready.connect(self.store)
+        self.worker.start()
+
+    def store(self, data, version):
+        self.data = data
+        self.version = version
+        self.on_data(data)
+
+    def close(self):
+        if self.worker:
+            self.worker.wait()
+
+class ReportChart:
+    # Stacked good/bad minutes per day. The bars are created once; later updates only
+    # change their heights (and rebuild the bars when the set of days changes), then
+    # ask for a deferred redraw instead of clearing and re-plotting the figure.
+    def __init__(self, figure, canvas):
+        self.figure = figure
+        self.canvas = canvas
+        self.ax = figure.add_subplot(111)
+        self.dates = None
+        self.good_bars = None
+        self.bad_bars = None
+
+    def update(self, data):
+        dates = sorted(data)
+        good = [data[d][0] / 60 for d in dates] # mins
+        bad = [data[d][1] / 60 for d in dates]
+
+        if not dates or dates != self.dates:
+            # No bars to update while the chart shows "No Data Available"
+            self.rebuild(dates, good, bad)
+        else:
+            for bar, g in zip(self.good_bars, good):
+                bar.set_height(g)
+            for bar, g, b in zip(self.bad_bars, good, bad):
+                bar.set_y(g)
+                bar.set_height(b)
+            self.ax.relim()
+            self.ax.autoscale_view()
+        self.canvas.draw_idle()
+
+    def rebuild(self, dates, good, bad):
+        self.ax.clear()
+        self.dates = dates
+        if not dates:
+            self.good_bars = self.bad_bars = None
+            self.ax.text(0.5, 0.5, "No Data Available", ha='center')
+            return
+        labels = [str(d) for d in dates]
+        self.good_bars = self.ax.bar(labels, good, label='Good Posture')
+        self.bad_bars = self.ax.bar(labels, bad, bottom=good, label='Bad Posture')
+        self.ax.set_ylabel('Duration (Minutes)')
+        self.ax.legend()
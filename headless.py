@@ -0,0 +1,142 @@
+import sys
+import json
+import time
+import signal
+import argparse
+
+# Headless posture monitor: drives HealthProcessor from a camera or video file and
+# writes one JSON object per line (label, confidence, timing). Does not import PyQt5
+# or the report charts, so it starts faster and runs as a background service
+# (MediaPipe's solutions package still imports matplotlib for its drawing utils):
+#   python headless.py --source 0 --interval 1 --output posture.jsonl
+#   python headless.py --source clip.mp4 --log-db
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Posture monitor without GUI (JSON lines output)")
+    parser.add_argument("--source", default=None,
+                        help="Camera index or video file (default: config.CAMERA_ID)")
+    parser.add_argument("--output", default="-", help="JSON lines file, '-' = stdout (default)")
+    parser.add_argument("--interval", type=float, default=0.0,
+                        help="Write at most one line per this many seconds (0 = every frame)")
+    parser.add_argument("--max-frames", type=int, default=0, help="Stop after this many frames (0 = no limit)")
+    parser.add_argument("--log-db", action="store_true", help="Also log the posture timeline to the database")
+    parser.add_argument("--user-id", type=int, default=1, help="User id for database logging")
+    parser.add_argument("--beep", action="store_true", help="Play the alert sound (off by default)")
+    return parser.parse_args(argv)
+
+def open_source(source):
+    import cv2
+    import config
+    if source is None:
+        source = config.CAMERA_ID
+    is_camera = isinstance(source, int) or source.isdigit()
+    cap = cv2.VideoCapture(int(source) if is_camera else source)
+    if not cap.isOpened():
+        raise SystemExit(f"Cannot open video source: {source}")
+    return cap, is_camera
+
+class HeadlessMonitor:
+    def __init__(self, args):
+        # Heavy imports happen here, after argument parsing (--help stays instant)
+        from core.processor import HealthProcessor
+        self.args = args
+        self.running = True
+
+        self.db = None
+        self.log_writer = None
+        if args.log_db:
+            from database import create_db_manager
+            from database.log_writer import AsyncPostureLogger
+            self.db = create_db_manager()
+            # posture_logs.user_id references users (the GUI adds its "admin" user the same way)
+            self.db.ensure_user(args.user_id)
+            self.log_writer = AsyncPostureLogger(self.db)
+
+        # render='off': no overlay drawing at all, nobody looks at the frames
+        self.processor = HealthProcessor(db_manager=self.log_writer, user_id=args.user_id,
+                                         render='off', sound=args.beep)
+        if self.processor.complexity:
+            # Load the other model complexity tiers now rather than mid-session
+            self.processor.complexity.check_tiers()
+        self.out = sys.stdout if args.output == "-" else open(args.output, "a", buffering=1)
+
+    def stop(self, *_):
+        self.running = False
+
+    def frames(self, cap, is_camera):
+        # Cameras go through the FrameGrabber (always the newest frame, stale ones are
+        # dropped); files are read in order so every frame is analysed
+        if not is_camera:
+            while self.running:
+                ret, frame = cap.read()
+                if not ret:
+                    return
+                yield frame, time.time()
+            return
+
+        from core.pipeline import FrameGrabber
+        grabber = FrameGrabber(cap)
+        grabber.start()
+        try:
+            seq = 0
+            while self.running:
+                seq, item = grabber.slot.get(seq, timeout=0.5)
+                if item is not None:
+                    yield item
+        finally:
+            grabber.stop()
+
+    def run(self):
+        cap, is_camera = open_source(self.args.source)
+        count = 0
+        last_write = 0.0
+        last_done = time.time()
+        try:
+            for frame, captured_at in self.frames(cap, is_camera):
+                _, label, conf = self.processor.process_frame(frame)
+                count += 1
+
+                now = time.time()
+                fps = 1.0 / (now - last_done) if now > last_done else 0
+                last_done = now
+                if now - last_write >= self.args.interval:
+                    last_write = now
+                    self.write({
+                        "time": round(now, 3),
+                        "frame": count,
+                        "label": label,
+                        "confidence": round(float(conf), 3),
+                        "model_confidence": round(float(self.processor.model_confidence), 3),
+                        "latency_ms": round((now - captured_at) * 1000, 1),
+                        "fps": round(fps, 1),
+                        "alerts": self.processor.alerts,
+                    })
+
+                if self.args.max_frames and count >= self.args.max_frames:
+                    break
+        finally:
+            cap.release()
+            self.close()
+
+    def write(self, record):
+        self.out.write(json.dumps(record) + "\n")
+        self.out.flush()
+
+    def close(self):
+        self.processor.end_session() # log the open timeline segment
+        if self.log_writer:
+            self.log_writer.close()
+        if self.out is not sys.stdout:
+            self.out.close()
+
+def main(argv=None):
+    args = parse_args(argv)
+    monitor = HeadlessMonitor(args)
+    # Service stop / Ctrl+C: finish the current frame and flush the logs
+    signal.signal(signal.SIGINT, monitor.stop)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, monitor.stop)
+    monitor.run()
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,42 @@
 import sys
 import traceback
 
+# Imported first so the startup profile measures from process start
+from core import startup
+
 def main():
     try:
         print("Initializing Application...")
         
         # CRITICAL: Import MediaPipe and OpenCV BEFORE PyQt5 to avoid DLL conflicts
-        import mediapipe as mp
-        print("MediaPipe imported successfully (Pre-load).")
-        import cv2
-        print("OpenCV imported successfully (Pre-load).")
+        with startup.timed("import mediapipe"):
+            import mediapipe as mp
+        print(f"MediaPipe imported successfully (Pre-load). [{startup.elapsed():.2f}s]")
+        with startup.timed("import cv2"):
+            import cv2
+        print(f"OpenCV imported successfully (Pre-load). [{startup.elapsed():.2f}s]")
         
-        from PyQt5.QtWidgets import QApplication
-        print("PyQt5 imported.")
-        from gui.main_window import MainWindow
-        print("MainWindow imported.")
+        with startup.timed("import PyQt5"):
+            from PyQt5.QtWidgets import QApplication
+        print(f"PyQt5 imported. [{startup.elapsed():.2f}s]")
+        with startup.timed("import MainWindow"):
+            from gui.main_window import MainWindow
+        print(f"MainWindow imported. [{startup.elapsed():.2f}s]")
         
         app = QApplication(sys.argv)
         print("QApplication created.")
         
-        window = MainWindow()
+        # Database, pose graph and model load in the background (BackendLoader);
+        # matplotlib when the Reports tab is first opened
+        with startup.timed("MainWindow()"):
+            window = MainWindow()
         print("MainWindow instantiated.")
         
         window.show()
-        print("Window shown. Entering event loop.")
+        startup.mark("window shown")
+        print(f"Window shown. Entering event loop. [{startup.elapsed():.2f}s]")
+        # The full profile (incl. backend ready / first frame displayed) is printed
+        # when the first video frame reaches the screen
         
         sys.exit(app.exec_())
     except Exception as e:
@@ -0,0 +1,95 @@
+import sys
+import json
+import time
+import signal
+import argparse
+import threading
+
+# Multi-stream posture monitor: one process watches several cameras / video files, one
+# user id each, sharing a pool of pose inference workers (core/engine.py). Like
+# headless.py it imports no GUI libraries and writes JSON lines:
+#   python server.py --stream 1=0 --stream 2=1 --stream 3=desk3.mp4 --workers 2 --log-db
+
+def parse_stream(spec):
+    # "USER_ID=SOURCE" -> (user_id, source)
+    user_id, sep, source = spec.partition("=")
+    if not sep or not user_id.isdigit() or not source:
+        raise argparse.ArgumentTypeError(f"expected USER_ID=SOURCE, got '{spec}'")
+    return int(user_id), source
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-stream posture monitor (JSON lines output)")
+    parser.add_argument("--stream", type=parse_stream, action="append", required=True, metavar="USER_ID=SOURCE",
+                        help="Camera index or video file for a user (repeat for more streams)")
+    parser.add_argument("--workers", type=int, default=0, help="Pose inference workers (0 = one per CPU core)")
+    parser.add_argument("--output", default="-", help="JSON lines file, '-' = stdout (default)")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="Write at most one line per stream per this many seconds (0 = every frame)")
+    parser.add_argument("--log-db", action="store_true", help="Log each stream's posture timeline to the database")
+    return parser.parse_args(argv)
+
+class ResultWriter:
+    # on_result callback for the engine: rate-limited JSON lines, safe to call from
+    # every stream thread
+    def __init__(self, out, interval):
+        self.out = out
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.last_write = {}
+
+    def __call__(self, stream, label, conf, latency):
+        now = time.time()
+        with self.lock:
+            if now - self.last_write.get(stream, 0.0) < self.interval:
+                return
+            self.last_write[stream] = now
+            self.out.write(json.dumps({
+                "time": round(now, 3),
+                "stream": stream,
+                "label": label,
+                "confidence": round(float(conf), 3),
+                "latency_ms": round(latency * 1000, 1),
+            }) + "\n")
+            self.out.flush()
+
+def main(argv=None):
+    args = parse_args(argv)
+    from core.engine import MultiStreamEngine
+
+    log_writer = None
+    if args.log_db:
+        from database import create_db_manager
+        from database.log_writer import AsyncPostureLogger
+        db = create_db_manager()
+        # posture_logs.user_id references users, and one unknown id would fail the
+        # shared batch insert for every stream
+        for user_id, _ in args.stream:
+            db.ensure_user(user_id)
+        log_writer = AsyncPostureLogger(db)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "a", buffering=1)
+    engine = MultiStreamEngine(workers=args.workers, db_manager=log_writer,
+                               on_result=ResultWriter(out, args.interval))
+    for user_id, source in args.stream:
+        engine.add_stream(f"user{user_id}-{source}", source, user_id=user_id)
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+
+    engine.start()
+    try:
+        # Until stopped, or until every stream has ended (video files)
+        while engine.running() and not stopping.wait(0.5):
+            pass
+    finally:
+        engine.stop()
+        if log_writer:
+            log_writer.close()
+        print(json.dumps({"time": round(time.time(), 3), "status": engine.status()}), file=out)
+        if out is not sys.stdout:
+            out.close()
+
+if __name__ == "__main__":
+    main()
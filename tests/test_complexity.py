@@ -0,0 +1,35 @@
+from core.complexity import ComplexityController
+
+class StubDetector:
+    # Stands in for PoseDetector; graphs for `broken` tiers fail to build
+    def __init__(self, model_complexity=1, broken=()):
+        self.model_complexity = model_complexity
+        self.broken = set(broken)
+
+    def check_model_complexity(self, model_complexity):
+        if model_complexity in self.broken:
+            raise RuntimeError(f"cannot load tier {model_complexity}")
+
+    def set_model_complexity(self, model_complexity):
+        self.check_model_complexity(model_complexity)
+        self.model_complexity = model_complexity
+
+def run(controller, latency, frames):
+    for _ in range(frames):
+        controller.record(latency)
+
+def test_failed_switch_keeps_current_tier():
+    detector = StubDetector(broken={0})
+    controller = ComplexityController(detector, target_fps=10, window=5, cooldown=5)
+    run(controller, 1.0, 20) # far over budget: tries to drop to tier 0
+    assert detector.model_complexity == 1
+    assert controller.tier == 1
+    assert controller.unavailable == {0}
+
+def test_unavailable_tiers_are_skipped():
+    detector = StubDetector(model_complexity=0, broken={1})
+    controller = ComplexityController(detector, target_fps=10, window=5, cooldown=5)
+    controller.check_tiers()
+    assert controller.unavailable == {1}
+    run(controller, 0.001, 20) # far under budget: upgrades straight to tier 2
+    assert detector.model_complexity == 2
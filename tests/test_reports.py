@@ -0,0 +1,71 @@
+from datetime import date
+
+import pytest
+
+pytest.importorskip("PyQt5")
+
+from gui.reports import ReportChart
+
+class StubBar:
+    def __init__(self, height, bottom):
+        self.height = height
+        self.y = bottom
+
+    def set_height(self, height):
+        self.height = height
+
+    def set_y(self, y):
+        self.y = y
+
+class StubAxes:
+    def __init__(self):
+        self.texts = []
+
+    def clear(self):
+        self.texts = []
+
+    def text(self, x, y, s, **kwargs):
+        self.texts.append(s)
+
+    def bar(self, labels, heights, bottom=None, label=None):
+        bottom = bottom or [0] * len(heights)
+        return [StubBar(h, b) for h, b in zip(heights, bottom)]
+
+    def set_ylabel(self, label):
+        pass
+
+    def legend(self):
+        pass
+
+    def relim(self):
+        pass
+
+    def autoscale_view(self):
+        pass
+
+class StubFigure:
+    def add_subplot(self, *args):
+        return StubAxes()
+
+class StubCanvas:
+    def draw_idle(self):
+        pass
+
+def test_repeated_empty_summaries_do_not_crash():
+    chart = ReportChart(StubFigure(), StubCanvas())
+    chart.update({})
+    chart.update({}) # e.g. "Refresh Data" while the database is down
+    assert chart.ax.texts == ["No Data Available"]
+
+def test_same_days_update_bars_in_place():
+    chart = ReportChart(StubFigure(), StubCanvas())
+    chart.update({date(2024, 1, 1): [60, 120]})
+    bars = chart.good_bars
+    chart.update({date(2024, 1, 1): [180, 60]})
+    assert chart.good_bars is bars
+    assert bars[0].height == 3
+    assert (chart.bad_bars[0].y, chart.bad_bars[0].height) == (3, 1)
+
+    chart.update({})
+    chart.update({date(2024, 1, 2): [60, 0]})
+    assert chart.good_bars[0].height == 1
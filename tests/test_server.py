@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("mediapipe")
+cv2 = pytest.importorskip("cv2")
+
+import database
+import server
+from database.sqlite_manager import SQLiteDatabaseManager
+
+def write_clip(path, frames=10):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (64, 48))
+    for i in range(frames):
+        writer.write(np.full((48, 64, 3), 40 + i * 10, dtype=np.uint8))
+    writer.release()
+
+def test_streams_log_for_users_that_do_not_exist_yet(tmp_path, monkeypatch):
+    clip = str(tmp_path / "clip.avi")
+    write_clip(clip)
+    db_path = str(tmp_path / "posture.db")
+    monkeypatch.setattr(database, "create_db_manager", lambda: SQLiteDatabaseManager(db_path))
+
+    server.main(["--stream", f"1={clip}", "--stream", f"2={clip}", "--workers", "1", "--log-db",
+                 "--output", str(tmp_path / "out.jsonl")])
+
+    db = SQLiteDatabaseManager(db_path)
+    users = {row['id'] for row in db.fetch_all("SELECT id FROM users")}
+    logged = {row['user_id'] for row in db.fetch_all("SELECT DISTINCT user_id FROM posture_logs")}
+    assert users >= {1, 2}
+    assert logged == {1, 2}
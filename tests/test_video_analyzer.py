@@ -0,0 +1,32 @@
+import os
+import pytest
+
+pytest.importorskip("mediapipe")
+pytest.importorskip("cv2")
+
+from data_pipeline.video_analyzer import VideoAnalyzer, list_videos
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb'):
+        pass
+
+def test_same_named_videos_in_subdirectories_get_separate_results(tmp_path):
+    first = tmp_path / "a" / "cam1.mp4"
+    second = tmp_path / "b" / "cam1.mp4"
+    touch(str(first))
+    touch(str(second))
+
+    videos = list_videos([str(tmp_path)])
+    assert videos == sorted([str(first), str(second)])
+
+    analyzer = VideoAnalyzer(output_dir=str(tmp_path / "out"), model_path=str(tmp_path / "missing.pkl"))
+    results = [analyzer.result_file(v) for v in videos]
+    assert results[0] != results[1]
+    assert all(os.path.basename(r).startswith("cam1-") for r in results)
+
+    # A result for one of them must not mark the other as already analysed
+    touch(results[0])
+    os.utime(results[0], (os.path.getmtime(videos[0]) + 10,) * 2)
+    assert analyzer.is_up_to_date(videos[0])
+    assert not analyzer.is_up_to_date(videos[1])